@@ -1,4 +1,5 @@
 from core.utils.params import AgentParams
+from core.utils.timer import PhaseTimer
 
 
 class Agent:
@@ -27,8 +28,11 @@ class Agent:
         self.optim = agent_params.optim
         self.tau = agent_params.tau
         self.learn_every = agent_params.learn_every
+        self.prefetch = agent_params.prefetch
 
         self.counter_steps = 0
+        # replaced by the monitor timer when training under a monitor
+        self.timer = PhaseTimer(enabled=False)
 
         self.seed = agent_params.seed
 
@@ -45,6 +49,9 @@ class Agent:
     def act(self, state):
         raise NotImplementedError("not implemented act function in your agent")
 
+    def step_and_act(self, state, action, reward, next_state, done, last=False):
+        raise NotImplementedError("not implemented step_and_act function in your agent")
+
     def learn(self, experiences):
         raise NotImplementedError("not implemented learn function in your agent")
 
@@ -53,3 +60,9 @@ class Agent:
 
     def load(self, checkpoint):
         raise NotImplementedError("not implemented load function in your agent")
+
+    def export(self, checkpoint):
+        raise NotImplementedError("not implemented export function in your agent")
+
+    def close(self):
+        pass
@@ -1,18 +1,23 @@
 from core.agents.agent import Agent
+import io
 import random
+import warnings
 import torch
+import torch.nn as nn
 import torch.nn.functional as F
 from torch.autograd import Variable
 
 import numpy as np
 from core.memories.replaybuffer import ReplayBuffer
+from core.memories.prefetcher import Prefetcher
+from core.serving.export import export_policy
 
 
 from core.utils.params import AgentParams
 from core.models.model import Model
 from core.memories.memory import Memory
 from numpy import float64, ndarray
-from typing import Tuple, Type, Union
+from typing import Optional, Tuple, Type, Union
 from numpy import float64, int64, ndarray
 
 
@@ -34,12 +39,23 @@ class MLPAgent(Agent):
         # Q-Network
         self.model = model_prototype(self.model_params).to(self.device)
         self.target_model = model_prototype(self.model_params).to(self.device)
+        self.model.flatten_parameters()
+        self.target_model.flatten_parameters(with_gradients=False)
         self.optimizer = self.optim(self.model.parameters(), **self.optim_params)
+        self._build_act_model()
 
         self._update_target_model()
+        self.update_every = agent_params.update_every
+        self.replay_ratio = agent_params.replay_ratio
+        self.learn_step = 0
+        self.bf16 = agent_params.bf16
+        # dynamic int8 quantization runs on cpu only
+        self.quantize_eval = agent_params.quantize_eval and not self.use_cuda
+        self.quantized_model = None
 
         # Memory
         self.memory = memory_prototype(self.memory_params)
+        self.prefetcher = None
 
         self.t_step = 0
         random.seed(self.seed)
@@ -54,45 +70,184 @@ class MLPAgent(Agent):
         done: bool,
     ) -> None:
 
-        s = self.memory.get_recent_states(state).flatten()
-        s2 = self.memory.get_recent_states(state, next_state).flatten()
-        self.memory.append(s, action, float(reward), s2, done)
-        self.memory.append_recent(state, done)
+        self._store(state, action, reward, next_state, done)
+
+    def _store(self, state, action, reward, next_state, done) -> ndarray:
+        with self.memory.lock:
+            next_states = self.memory.store(
+                state, action, float(reward), next_state, done
+            )
         self.t_step = (self.t_step + 1) % self.learn_every
+        return next_states
+
+    def step_and_act(
+        self,
+        state: ndarray,
+        action: int,
+        reward: Union[float64, int],
+        next_state: ndarray,
+        done: bool,
+        last: bool = False,
+    ) -> Tuple[Optional[int], Optional[float]]:
+        """Store the transition, learn when due, then act on next_state.
+
+        The action is computed from the stacked next state the memory just wrote in its
+        window, without writing it again. Returns (action, loss), action is None when done or
+        on the last step of the episode, loss is None without an update.
+        """
+        with self.timer["agent.step"]:
+            next_states = self._store(state, action, reward, next_state, done)
+
+        loss = None
+        if self.t_step == 0:
+            with self.timer["learn"]:
+                loss = self.learn()
+
+        if done or last:
+            return None, loss
+        with self.timer["act"]:
+            return self._act_on_state(next_states.reshape(-1)), loss
+
+    def step_batch(
+        self,
+        states: ndarray,
+        actions: ndarray,
+        rewards: ndarray,
+        next_states: ndarray,
+        dones: ndarray,
+        resets: ndarray = None,
+        streams: ndarray = None,
+    ) -> None:
+        with self.memory.lock:
+            self.memory.store_batch(
+                states,
+                actions,
+                rewards.astype(np.float32),
+                next_states,
+                dones,
+                resets,
+                streams,
+            )
+        self.t_step = (self.t_step + len(states)) % self.learn_every
+
+    def act_batch(self, observations: ndarray, streams: ndarray = None) -> ndarray:
+        """One action per environment, from a single forward pass over the batch"""
+        observations = self.memory.get_recent_states_batch(
+            observations, streams=streams
+        )
+        observations = torch.from_numpy(observations.reshape(len(observations), -1))
+
+        with torch.no_grad():
+            q_values = self.act_model(observations.to(self.device))
+        actions = q_values.argmax(1).cpu().numpy()
+
+        if self.training:
+            explore = np.random.uniform(size=len(actions)) < self.eps
+            actions[explore] = np.random.randint(self.action_dim, size=explore.sum())
+
+        return actions
 
     def act(self, observation: ndarray) -> int:
-        observation = self.memory.get_recent_states(observation).flatten()
+        return self._act_on_state(
+            self.memory.get_recent_states(observation).reshape(-1)
+        )
 
+    def _act_on_state(self, state: ndarray) -> int:
         if self.training:
-            action = self._epsilon_greedy(observation)
+            action = self._epsilon_greedy(state)
         else:
-            action, _ = self.get_raw_actions(observation)
+            action, _ = self.get_raw_actions(state)
 
         return action
 
     def learn(self) -> None:
-        if len(self.memory) >= self.batch_size:
-            self.model.train()
-            experiences = self.memory.sample(self.batch_size)
-            states, actions, rewards, next_states, dones = experiences
-
+        if len(self.memory) >= self.batch_size * self.replay_ratio:
+            with self.timer["learn.sample"]:
+                experiences = self._sample()
+
+            if self.replay_ratio == 1:
+                with self.timer["learn.update"]:
+                    return self._update(*experiences)
+
+            # one sample of replay_ratio minibatches. Prioritized and memmap indices come
+            # in segment or sorted order: one permutation shared by all the fields, before
+            # splitting, gives each minibatch draws from the whole buffer
+            order = np.random.permutation(len(experiences[0]))
+            batches = zip(
+                *(
+                    (
+                        np.array_split(field[order], self.replay_ratio)
+                        if isinstance(field, np.ndarray)
+                        else torch.tensor_split(
+                            field[torch.from_numpy(order).to(field.device)],
+                            self.replay_ratio,
+                        )
+                    )
+                    for field in experiences
+                )
+            )
+            losses = []
+            for batch in batches:
+                if len(batch) > 5:
+                    # importance-sampling weights are normalised by minibatch
+                    weights = batch[5]
+                    batch = batch[:5] + (weights / weights.max(),) + batch[6:]
+                with self.timer["learn.update"]:
+                    losses.append(self._update(*batch))
+            return np.mean(losses)
+
+    def _update(self, states, actions, rewards, next_states, dones, *priorities):
+        # states may be stored in 16 bits
+        states, next_states = states.float(), next_states.float()
+
+        # bfloat16 keeps the float32 exponent range: gradients do not underflow as in
+        # float16, no loss scaling is needed. Parameters and optimizer state stay float32.
+        with torch.autocast(self.device.type, dtype=torch.bfloat16, enabled=self.bf16):
             Q_targets_next = (
                 self.target_model(next_states).detach().max(1)[0].unsqueeze(1)
             )
-            Q_targets = rewards + (self.gamma * Q_targets_next * (1 - dones))
-
             Q_expected = self.model(states).gather(1, actions)
-
+        Q_targets = rewards + (self.gamma * Q_targets_next.float() * (1 - dones))
+        Q_expected = Q_expected.float()
+
+        if priorities:
+            # prioritized memories also return importance-sampling weights and indices
+            weights, indices = priorities
+            td_errors = Q_targets - Q_expected
+            loss = (weights * td_errors.pow(2)).mean()
+            with self.memory.lock:
+                self.memory.update_priorities(
+                    indices, td_errors.detach().abs().cpu().numpy().flatten()
+                )
+        else:
             loss = F.mse_loss(Q_expected, Q_targets)
-            self.optimizer.zero_grad()
-            loss.backward()
-            for param in self.model.parameters():
-                param.grad.data.clamp_(-self.clip_grad, self.clip_grad)
-
-            self.optimizer.step()
-            self._soft_update_target_model()
-
-            return loss.cpu().detach().numpy()
+        # gradients are views on one buffer: zeroed and clipped in a single operation
+        self.model.flat_gradients.zero_()
+        loss.backward()
+        self.model.flat_gradients.clamp_(-self.clip_grad, self.clip_grad)
+
+        self.optimizer.step()
+        self.learn_step += 1
+        if self.learn_step % self.update_every == 0:
+            with self.timer["learn.target"]:
+                self._soft_update_target_model()
+
+        return loss.cpu().detach().numpy()
+
+    def _sample(self):
+        batch_size = self.batch_size * self.replay_ratio
+        if not self.prefetch:
+            return self.memory.sample(batch_size)
+
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self.memory, batch_size, self.prefetch)
+        return self.prefetcher.get()
+
+    def close(self) -> None:
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+        self.memory.close()
 
     def save(self, checkpoint=""):
         if checkpoint == "":
@@ -110,16 +265,76 @@ class MLPAgent(Agent):
 
         self.model.load_state_dict(torch.load(checkpoint))
 
+    def export(self, checkpoint=""):
+        """Write the model weights for core.serving.NumpyPolicy, returns the file path"""
+        if checkpoint == "":
+            checkpoint = f"{self.model_dir}{self.agent_name}.npz"
+        else:
+            checkpoint = f"{self.model_dir}{checkpoint}"
+
+        return export_policy(self.model, checkpoint)
+
+    def save_checkpoint(self, checkpoint="", meta=None):
+        """Full training state, `meta` holds the caller counters (episode, steps) as plain values"""
+        if checkpoint == "":
+            checkpoint = f"{self.model_dir}{self.agent_name}.ckpt"
+        else:
+            checkpoint = f"{self.model_dir}{checkpoint}"
+
+        with self.memory.lock:
+            self.memory.save(f"{checkpoint}.memory")
+
+        _, key, position, has_gauss, gauss = np.random.get_state()
+        torch.save(
+            {
+                "model": self.model.state_dict(),
+                "target_model": self.target_model.state_dict(),
+                "optimizer": self.optimizer.state_dict(),
+                "eps": self.eps,
+                "t_step": self.t_step,
+                "learn_step": self.learn_step,
+                "random_state": random.getstate(),
+                "numpy_state": [key.tolist(), position, has_gauss, gauss],
+                "torch_state": torch.get_rng_state(),
+                "meta": meta or {},
+            },
+            checkpoint,
+        )
+        self.logger.info(f"Checkpoint saved in {checkpoint}")
+
+    def load_checkpoint(self, checkpoint="") -> dict:
+        """Restore the training state, returns the meta given to save_checkpoint"""
+        if checkpoint == "":
+            checkpoint = f"{self.model_dir}{self.agent_name}.ckpt"
+        else:
+            checkpoint = f"{self.model_dir}{checkpoint}"
+
+        state = torch.load(checkpoint)
+        self.model.load_state_dict(state["model"])
+        self.target_model.load_state_dict(state["target_model"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.eps = state["eps"]
+        self.t_step = state["t_step"]
+        self.learn_step = state.get("learn_step", 0)
+
+        random.setstate(state["random_state"])
+        key, position, has_gauss, gauss = state["numpy_state"]
+        np.random.set_state(
+            ("MT19937", np.array(key, dtype=np.uint32), position, has_gauss, gauss)
+        )
+        torch.set_rng_state(state["torch_state"])
+
+        with self.memory.lock:
+            self.memory.load(f"{checkpoint}.memory")
+        self.logger.info(f"Checkpoint loaded from {checkpoint}")
+        return state.get("meta", {})
+
     def _update_target_model(self) -> None:
         self.target_model.load_state_dict(self.model.state_dict())
 
     def _soft_update_target_model(self) -> None:
-        for target_param, local_param in zip(
-            self.target_model.parameters(), self.model.parameters()
-        ):
-            target_param.data.copy_(
-                self.tau * local_param.data + (1.0 - self.tau) * target_param.data
-            )
+        # target += tau * (local - target), in place over the flattened parameters
+        self.target_model.flat_parameters.lerp_(self.model.flat_parameters, self.tau)
 
     def update_epsilon(self) -> None:
         self.eps = max(self.eps_end, self.eps * self.eps_decay)
@@ -133,14 +348,74 @@ class MLPAgent(Agent):
 
         return action
 
-    def get_raw_actions(self, observation: ndarray) -> int64:
-        observation = (
-            torch.from_numpy(np.array(observation)).unsqueeze(0).float().to(self.device)
+    def _build_act_model(self) -> None:
+        """Traced forward of the model over a preallocated (1, input) tensor, to act step by step
+
+        The traced module shares the model parameters, it follows the updates and loaded
+        weights. The model has neither dropout nor batch norm: it is never switched to eval mode.
+        """
+        input_size = self.model_params.hist_len * int(
+            np.prod(self.model_params.state_shape)
         )
+        self.act_input = torch.zeros((1, input_size), device=self.device)
+        # on cpu the observation is written through a numpy view of the input
+        self.act_input_array = None if self.use_cuda else self.act_input.numpy()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.traced_model = torch.jit.trace(self.model, self.act_input)
+        self.act_model = self.traced_model
+
+    def quantize(self) -> None:
+        """Act with a copy of the model whose Linear layers are dynamically quantized to int8
+
+        The copy is a snapshot of the current weights, for evaluation and test rollouts:
+        `dequantize` goes back to the fp32 model before training again.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.quantized_model = torch.ao.quantization.quantize_dynamic(
+                self.model, {nn.Linear}, dtype=torch.qint8
+            )
+        self.act_model = self.quantized_model
+
+    def dequantize(self) -> None:
+        self.quantized_model = None
+        self.act_model = self.traced_model
+
+    def quantization_report(self, states: ndarray, quantized_actions: ndarray = None):
+        """Agreement rate of the int8 and fp32 greedy actions on states, and the int8 size ratio
+
+        quantized_actions are the greedy actions taken by the int8 model on states, computed
+        here over the whole batch if not given. The size ratio is the one of the serialized
+        int8 and fp32 weights. The int8 speedup is measured by the agent benchmarks.
+        """
+        states = torch.from_numpy(np.reshape(states, (len(states), -1))).float()
+        with torch.no_grad():
+            actions = self.traced_model(states).argmax(1).numpy()
+            if quantized_actions is None:
+                quantized_actions = self.quantized_model(states).argmax(1).numpy()
+        agreement = np.mean(actions == quantized_actions)
+
+        sizes = []
+        for model in (self.model, self.quantized_model):
+            buffer = io.BytesIO()
+            torch.save(model.state_dict(), buffer)
+            sizes.append(buffer.tell())
+        return agreement, sizes[1] / sizes[0]
+
+    def get_raw_actions(self, observation: ndarray) -> int64:
+        if self.use_cuda:
+            self.act_input.copy_(
+                torch.from_numpy(
+                    np.asarray(observation, dtype=np.float32).reshape(1, -1)
+                )
+            )
+        else:
+            self.act_input_array[0] = np.reshape(observation, -1)
 
         with torch.no_grad():
-            self.model.eval()
-            q_values = self.model(observation).data
+            q_values = self.act_model(self.act_input)
 
         if self.use_cuda:
             q_values = q_values.cpu().numpy()
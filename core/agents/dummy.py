@@ -23,3 +23,6 @@ class DummyAgent(Agent):
 
     def load(self, checkpoint):
         pass
+
+    def export(self, checkpoint):
+        pass
@@ -1,4 +1,12 @@
 from core.envs.gym import GymEnv
-from core.envs.unity import UnityEnv
+from core.envs.unity import UnityEnv, UnityBatchEnv
+from core.envs.subproc import SubprocGymEnv
+from core.envs.synthetic import SyntheticEnv
 
-ENV_DICT = {"gym": GymEnv, "unity": UnityEnv}
+ENV_DICT = {
+    "gym": GymEnv,
+    "unity": UnityEnv,
+    "unity_batched": UnityBatchEnv,
+    "gym_subproc": SubprocGymEnv,
+    "synthetic": SyntheticEnv,
+}
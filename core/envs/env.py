@@ -12,3 +12,6 @@ class Env:
         self.logger.info(
             f"-----------------------------[ {env_name} w/ seed {self.seed} ]------------------"
         )
+
+    def close(self) -> None:
+        pass
@@ -24,3 +24,6 @@ class GymEnv(Env):
 
     def render(self):
         return self.env.render(mode="rgb_array")
+
+    def close(self):
+        self.env.close()
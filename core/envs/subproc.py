@@ -0,0 +1,226 @@
+from core.envs.env import Env
+from core.envs.gym import GymEnv
+import copy
+import weakref
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from core.utils.params import EnvParams
+from numpy import ndarray
+from typing import Dict, Tuple
+
+# one byte commands sent to a worker, echoed back once its results are in shared memory
+_STEP = b"s"
+_RESET = b"r"
+_CLOSE = b"c"
+
+
+def _layout(num_envs: int, state_shape: Tuple[int]) -> Dict[str, tuple]:
+    return dict(
+        actions=((num_envs,), np.int64),
+        observations=((num_envs,) + tuple(state_shape), np.float32),
+        next_observations=((num_envs,) + tuple(state_shape), np.float32),
+        rewards=((num_envs,), np.float64),
+        dones=((num_envs,), bool),
+        resets=((num_envs,), bool),
+    )
+
+
+def _worker(index, env_prototype, env_params, max_steps_in_episode, arrays, conn):
+    env = env_prototype(env_params)
+    episode_steps = 0
+    try:
+        while True:
+            command = conn.recv_bytes()
+            if command == _STEP:
+                next_observation, reward, done = env.step(int(arrays["actions"][index]))
+                episode_steps += 1
+                reset = done or episode_steps >= max_steps_in_episode
+
+                arrays["next_observations"][index] = next_observation
+                arrays["rewards"][index] = reward
+                arrays["dones"][index] = done
+                arrays["resets"][index] = reset
+                if reset:
+                    next_observation = env.reset()
+                    episode_steps = 0
+                arrays["observations"][index] = next_observation
+            elif command == _RESET:
+                arrays["observations"][index] = env.reset()
+                episode_steps = 0
+            else:
+                break
+            conn.send_bytes(command)
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        env.close()
+
+
+def _shutdown(processes, conns, shared_memory) -> None:
+    for conn in conns:
+        try:
+            conn.send_bytes(_CLOSE)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for conn in conns:
+        conn.close()
+    shared_memory.close()
+    shared_memory.unlink()
+
+
+class SubprocVectorEnv(Env):
+    """Runs each of num_envs environments in its own worker process.
+
+    Workers write observations, rewards and dones in arrays of one shared memory block and
+    only exchange one byte commands with the main process. With `ready_envs` set, `step`
+    returns as soon as this many workers are done and `ready` holds their indices: the next
+    actions are for these environments, while the others keep stepping.
+
+    Workers are forked, this environment needs a fork-capable platform (Linux).
+    """
+
+    vectorized = True
+
+    def __init__(
+        self, env_prototype, env_params: EnvParams, max_steps_in_episode: int
+    ) -> None:
+        num_envs = env_params.num_envs
+        super(SubprocVectorEnv, self).__init__(f"Subprocess x{num_envs}", env_params)
+
+        self.env_prototype = env_prototype
+        self.env_params = env_params
+        self.num_envs = num_envs
+        self.ready_envs = env_params.ready_envs or num_envs
+        self.synchronous = self.ready_envs >= num_envs
+        self.max_steps_in_episode = max_steps_in_episode
+
+        probe = env_prototype(env_params)
+        self.state_shape = probe.get_state_shape()
+        self.action_size = probe.get_action_size()
+        probe.close()
+
+        layout = _layout(num_envs, self.state_shape)
+        sizes = [
+            int(np.prod(shape)) * np.dtype(dtype).itemsize
+            for shape, dtype in layout.values()
+        ]
+        self.shared_memory = SharedMemory(create=True, size=sum(sizes))
+
+        offset = 0
+        self.arrays = {}
+        for (name, (shape, dtype)), size in zip(layout.items(), sizes):
+            self.arrays[name] = np.ndarray(
+                shape, dtype, buffer=self.shared_memory.buf, offset=offset
+            )
+            offset += size
+
+        context = mp.get_context("fork")
+        self.conns = []
+        self.processes = []
+        for i in range(num_envs):
+            params = copy.copy(env_params)
+            params.seed = env_params.seed + i
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(
+                    i,
+                    env_prototype,
+                    params,
+                    max_steps_in_episode,
+                    self.arrays,
+                    worker_conn,
+                ),
+                name=f"env-worker-{i}",
+                daemon=True,
+            )
+            process.start()
+            worker_conn.close()
+            self.conns.append(conn)
+            self.processes.append(process)
+
+        # workers stepping, and the environments returned by the last step (None for all)
+        self.pending = set()
+        self.ready = None
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self.processes, self.conns, self.shared_memory
+        )
+
+    @property
+    def observations(self) -> ndarray:
+        return self.arrays["observations"]
+
+    @property
+    def resets(self) -> ndarray:
+        return self.arrays["resets"]
+
+    def get_state_shape(self):
+        return self.state_shape
+
+    def get_action_size(self):
+        return self.action_size
+
+    def _send(self, command: bytes, indices) -> None:
+        for i in indices:
+            self.conns[i].send_bytes(command)
+        self.pending.update(indices)
+
+    def _wait(self, n_envs: int) -> ndarray:
+        done = []
+        while len(done) < n_envs:
+            for conn in wait([self.conns[i] for i in self.pending]):
+                i = self.conns.index(conn)
+                conn.recv_bytes()
+                self.pending.discard(i)
+                done.append(i)
+        return np.sort(done)
+
+    def reset(self) -> ndarray:
+        self._wait(len(self.pending))
+        self._send(_RESET, range(self.num_envs))
+        self._wait(self.num_envs)
+        self.resets[:] = False
+        self.ready = None if self.synchronous else np.arange(self.num_envs)
+        return self.observations.copy()
+
+    def step(self, actions: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+        indices = range(self.num_envs) if self.ready is None else self.ready
+        self.arrays["actions"][indices] = actions
+        self._send(_STEP, indices)
+
+        ready = self._wait(self.ready_envs)
+        if self.synchronous:
+            self.ready = None
+            ready = slice(None)
+        else:
+            self.ready = ready
+
+        return (
+            self.arrays["next_observations"][ready].copy(),
+            self.arrays["rewards"][ready].copy(),
+            self.arrays["dones"][ready].copy(),
+        )
+
+    def make_eval_env(self) -> Env:
+        return self.env_prototype(self.env_params)
+
+    def render(self):
+        return None
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+class SubprocGymEnv(SubprocVectorEnv):
+    """Gym environments in worker processes"""
+
+    def __init__(self, env_params: EnvParams, max_steps_in_episode: int) -> None:
+        super(SubprocGymEnv, self).__init__(GymEnv, env_params, max_steps_in_episode)
@@ -0,0 +1,68 @@
+from core.envs.env import Env
+import numpy as np
+
+from core.utils.params import EnvParams
+from numpy import ndarray
+from typing import Tuple
+
+# side of the square matrix multiplied step_cost times per step, to emulate a costly simulator
+COST_SIZE = 256
+
+
+class SyntheticEnv(Env):
+    """NumPy environment with configurable sizes and per-step cost, to measure throughput.
+
+    The observation follows fixed random linear dynamics squashed by tanh, pushed by the
+    action: next = tanh(A @ observation + B[action]), and the reward is W[action] @ observation,
+    so that a greedy agent can learn it. The dynamics only depend on the sizes, episodes on
+    the seed: envs with the same seed give the same trajectories for the same actions.
+    An episode ends after synthetic_episode_length steps.
+    """
+
+    def __init__(self, env_params: EnvParams) -> None:
+        super(SyntheticEnv, self).__init__("Synthetic", env_params)
+
+        self.obs_size = env_params.synthetic_obs_size
+        self.action_size = env_params.synthetic_action_size
+        self.episode_length = env_params.synthetic_episode_length
+        self.step_cost = env_params.synthetic_step_cost
+
+        task = np.random.RandomState(self.obs_size * 1000 + self.action_size)
+        scale = 1 / np.sqrt(self.obs_size)
+        self.dynamics = task.normal(0, scale, (self.obs_size, self.obs_size))
+        self.pushes = task.normal(0, 1, (self.action_size, self.obs_size))
+        self.rewards = task.normal(0, scale, (self.action_size, self.obs_size))
+        self.cost_matrix = task.normal(0, 1 / COST_SIZE, (COST_SIZE, COST_SIZE))
+        self.cost_vector = np.ones(COST_SIZE)
+
+        self.rng = np.random.RandomState(self.seed)
+        self.observation = np.zeros(self.obs_size)
+        self.episode_step = 0
+
+    def get_state_shape(self) -> Tuple[int]:
+        return (self.obs_size,)
+
+    def get_action_size(self) -> int:
+        return self.action_size
+
+    def reset(self) -> ndarray:
+        self.observation = self.rng.uniform(-1, 1, self.obs_size)
+        self.episode_step = 0
+        return self.observation.copy()
+
+    def step(self, action: int) -> Tuple[ndarray, float, bool]:
+        reward = float(self.rewards[action] @ self.observation)
+        self.observation = np.tanh(
+            self.dynamics @ self.observation + self.pushes[action]
+        )
+        for _ in range(self.step_cost):
+            self.cost_vector = np.tanh(self.cost_matrix @ self.cost_vector)
+
+        self.episode_step += 1
+        done = self.episode_step >= self.episode_length
+        return self.observation.copy(), reward, done
+
+    def render(self) -> ndarray:
+        # one gray column band per observation value
+        pixels = np.round((self.observation + 1) * 127.5).astype(np.uint8)
+        return np.repeat(np.repeat(pixels[None, :, None], 32, 0), 8, 1).repeat(3, 2)
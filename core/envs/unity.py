@@ -1,5 +1,6 @@
 from core.envs.env import Env
 from unityagents import UnityEnvironment
+import copy
 import numpy as np
 
 
@@ -7,15 +8,23 @@ class UnityEnv(Env):
     def __init__(self, env_params):
         super(UnityEnv, self).__init__("Unity", env_params)
 
-        self.env = UnityEnvironment(file_name=self.game)
+        self.env = UnityEnvironment(file_name=self.game, worker_id=env_params.worker_id)
         self.brain_name = self.env.brain_names[0]
         self.brain = self.env.brains[self.brain_name]
 
         self.pixels = env_params.pixels
         self.training = True
 
-    def get_state_shape(self):
+        # a brain can drive several agents: this env acts for agent 0, the others get noop_action
+        self.noop_action = env_params.unity_noop_action
+        self.actions = None
+
+    def _reset_info(self):
         self.env_info = self.env.reset(train_mode=self.training)[self.brain_name]
+        self.actions = np.full(len(self.env_info.agents), self.noop_action)
+
+    def get_state_shape(self):
+        self._reset_info()
         state = self.env_info.vector_observations[0]
         self.logger.debug(f'{state}')
         return state.shape
@@ -24,11 +33,12 @@ class UnityEnv(Env):
         return self.brain.vector_action_space_size
 
     def reset(self):
-        self.env_info = self.env.reset(train_mode=self.training)[self.brain_name]
+        self._reset_info()
         return self.env_info.vector_observations[0]
 
     def step(self, action):
-        self.env_info = self.env.step(action)[self.brain_name]
+        self.actions[0] = action
+        self.env_info = self.env.step(self.actions)[self.brain_name]
         next_state = self.env_info.vector_observations[0]
         reward = self.env_info.rewards[0]
         done = self.env_info.local_done[0]
@@ -39,3 +49,57 @@ class UnityEnv(Env):
             return np.squeeze(self.env_info.visual_observations[0])
         else:
             return None
+
+    def close(self):
+        self.env.close()
+
+
+class UnityBatchEnv(UnityEnv):
+    """All the agents of the brain, as the leading dimension of observations, rewards and dones
+
+    Actions of every agent are sent in one step. Agents done before the others are reset by
+    Unity, the whole scene is reset once all agents are done or after max_steps_in_episode.
+    """
+
+    vectorized = True
+
+    def __init__(self, env_params, max_steps_in_episode):
+        super(UnityBatchEnv, self).__init__(env_params)
+
+        self.env_params = env_params
+        self.max_steps_in_episode = max_steps_in_episode
+
+        self.num_envs = len(self.env.reset(train_mode=self.training)[self.brain_name].agents)
+        self.observations = None
+        self.episode_steps = 0
+        self.resets = np.zeros(self.num_envs, dtype=bool)
+        self.ready = None
+
+    def make_eval_env(self):
+        # a second Unity instance, on the next worker port
+        params = copy.copy(self.env_params)
+        params.worker_id = self.env_params.worker_id + 1
+        return UnityEnv(params)
+
+    def reset(self):
+        self.env_info = self.env.reset(train_mode=self.training)[self.brain_name]
+        self.observations = np.array(self.env_info.vector_observations)
+        self.episode_steps = 0
+        self.resets[:] = False
+        return self.observations
+
+    def step(self, actions):
+        self.env_info = self.env.step(np.asarray(actions))[self.brain_name]
+        next_states = np.array(self.env_info.vector_observations)
+        rewards = np.array(self.env_info.rewards, dtype=np.float64)
+        dones = np.array(self.env_info.local_done, dtype=bool)
+
+        self.episode_steps += 1
+        if dones.all() or self.episode_steps >= self.max_steps_in_episode:
+            self.reset()
+            self.resets[:] = True
+        else:
+            self.resets = dones.copy()
+            self.observations = next_states
+
+        return next_states, rewards, dones
@@ -0,0 +1,90 @@
+import numpy as np
+from unityagents.brain import BrainInfo, BrainParameters
+from unityagents.exception import UnityActionException
+
+
+class LocalUnityEnvironment:
+    """In-process stand-in for unityagents.UnityEnvironment, to run UnityEnv without a Unity binary.
+
+    One external brain drives n_agents agents on a line. Each agent starts at a random
+    position and walks toward a goal (actions: 0 forward, 1 backward, 2 and 3 stay). It gets
+    +1 and is done at the goal, and -0.01 per step otherwise. Done agents restart on the next
+    step, as Unity agents resetting on done do. The observation is (position, goal, distance,
+    steps left) scaled to [-1, 1].
+    """
+
+    n_agents = 4
+    max_steps = 50
+
+    def __init__(self, file_name=None, worker_id=0, seed=0, **kwargs):
+        self.brain_names = ["LocalBrain"]
+        self.external_brain_names = self.brain_names
+        self.brains = {
+            "LocalBrain": BrainParameters(
+                "LocalBrain",
+                {
+                    "vectorObservationSize": 4,
+                    "numStackedVectorObservations": 1,
+                    "cameraResolutions": [],
+                    "vectorActionSize": 4,
+                    "vectorActionDescriptions": ["forward", "backward", "stay", "stay"],
+                    "vectorActionSpaceType": 0,
+                    "vectorObservationSpaceType": 1,
+                },
+            )
+        }
+        self.worker_id = worker_id
+        self.rng = np.random.RandomState(seed + worker_id)
+        self.positions = np.zeros(self.n_agents)
+        self.steps = np.zeros(self.n_agents, dtype=np.int64)
+        self.done = np.zeros(self.n_agents, dtype=bool)
+        self.goal = 5.0
+
+    def _restart(self, agents) -> None:
+        self.positions[agents] = self.rng.randint(-5, 5, size=len(agents))
+        self.steps[agents] = 0
+        self.done[agents] = False
+
+    def _info(self, rewards) -> dict:
+        observations = np.stack(
+            [
+                self.positions / 10,
+                np.full(self.n_agents, self.goal / 10),
+                (self.goal - self.positions) / 10,
+                1 - self.steps / self.max_steps,
+            ],
+            axis=1,
+        )
+        info = BrainInfo(
+            visual_observation=[],
+            vector_observation=observations,
+            text_observations=[""] * self.n_agents,
+            reward=list(rewards),
+            agents=list(range(self.n_agents)),
+            local_done=list(self.done),
+            max_reached=list(self.steps >= self.max_steps),
+        )
+        return {"LocalBrain": info}
+
+    def reset(self, train_mode=True, config=None, lesson=None):
+        self._restart(np.arange(self.n_agents))
+        return self._info(np.zeros(self.n_agents))
+
+    def step(self, vector_action=None, memory=None, text_action=None):
+        actions = np.asarray(vector_action).reshape(-1)
+        if len(actions) != self.n_agents:
+            raise UnityActionException(
+                f"There are {self.n_agents} agents, got {len(actions)} actions"
+            )
+
+        self._restart(np.flatnonzero(self.done))
+        self.positions += np.select([actions == 0, actions == 1], [1.0, -1.0], 0.0)
+        self.steps += 1
+
+        at_goal = self.positions >= self.goal
+        rewards = np.where(at_goal, 1.0, -0.01)
+        self.done = at_goal | (self.steps >= self.max_steps)
+        return self._info(rewards)
+
+    def close(self):
+        pass
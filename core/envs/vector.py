@@ -0,0 +1,72 @@
+from core.envs.env import Env
+import copy
+import numpy as np
+
+from core.utils.params import EnvParams
+from numpy import ndarray
+from typing import Tuple
+
+
+class VectorEnv(Env):
+    """Steps num_envs copies of an environment together, with batched observations.
+
+    An environment whose episode ended (done or max_steps_in_episode reached) is reset
+    in step: `step` returns the true next observations, while `observations` holds the
+    observations to act on, and `resets` flags the environments that were reset.
+    """
+
+    vectorized = True
+
+    def __init__(
+        self, env_prototype, env_params: EnvParams, max_steps_in_episode: int
+    ) -> None:
+        num_envs = env_params.num_envs
+        super(VectorEnv, self).__init__(f"Vector x{num_envs}", env_params)
+
+        self.envs = []
+        for i in range(num_envs):
+            params = copy.copy(env_params)
+            params.seed = env_params.seed + i
+            self.envs.append(env_prototype(params))
+
+        self.num_envs = num_envs
+        self.max_steps_in_episode = max_steps_in_episode
+
+        self.observations = None
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self.resets = np.zeros(num_envs, dtype=bool)
+        # environments returned by the last step, None for all of them
+        self.ready = None
+
+    def get_state_shape(self):
+        return self.envs[0].get_state_shape()
+
+    def get_action_size(self):
+        return self.envs[0].get_action_size()
+
+    def reset(self) -> ndarray:
+        self.observations = np.stack([env.reset() for env in self.envs])
+        self.episode_steps[:] = 0
+        self.resets[:] = False
+        return self.observations
+
+    def step(self, actions: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+        transitions = [env.step(action) for env, action in zip(self.envs, actions)]
+        next_observations, rewards, dones = map(np.array, zip(*transitions))
+
+        self.episode_steps += 1
+        self.resets = dones | (self.episode_steps >= self.max_steps_in_episode)
+
+        self.observations = next_observations.copy()
+        for i in np.flatnonzero(self.resets):
+            self.observations[i] = self.envs[i].reset()
+            self.episode_steps[i] = 0
+
+        return next_observations, rewards, dones
+
+    def render(self):
+        return self.envs[0].render()
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
@@ -1,4 +1,16 @@
 from core.memories.memory import Memory
 from core.memories.replaybuffer import ReplayBuffer
+from core.memories.arraybuffer import ArrayBuffer
+from core.memories.framebuffer import FrameBuffer
+from core.memories.prioritized import PrioritizedBuffer, SumTree
+from core.memories.tensorbuffer import TensorBuffer
+from core.memories.memmap import MemmapBuffer
 
-MEMORY_DICT = {"replaybuffer": ReplayBuffer}
+MEMORY_DICT = {
+    "replaybuffer": ReplayBuffer,
+    "arraybuffer": ArrayBuffer,
+    "framebuffer": FrameBuffer,
+    "prioritized": PrioritizedBuffer,
+    "tensorbuffer": TensorBuffer,
+    "memmap": MemmapBuffer,
+}
@@ -0,0 +1,124 @@
+from core.memories.memory import Memory
+import numpy as np
+import torch
+
+from core.utils.params import MemoryParams
+from numpy import ndarray
+from typing import Tuple
+
+
+class ArrayBuffer(Memory):
+    """Replay buffer stored in preallocated arrays (allocated on first append) with a write cursor"""
+
+    fields = ("states", "actions", "rewards", "next_states", "dones")
+    # loaded columns can replace the storage arrays
+    restore_in_place = True
+
+    def __init__(
+        self, memory_params: MemoryParams, memory_name: str = "Array Buffer"
+    ) -> None:
+        self.combined_with_last = memory_params.combined_with_last
+        prefix = "Combined " if self.combined_with_last else ""
+        super(ArrayBuffer, self).__init__(f"{prefix}{memory_name}", memory_params)
+
+        self.cursor = 0
+        self.size = 0
+
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.dones = None
+
+    def _allocate(self, observation: ndarray) -> None:
+        shape = (self.memory_size,) + np.shape(observation)
+        self.states = np.zeros(shape, dtype=self.state_dtype)
+        self.actions = np.zeros((self.memory_size, 1), dtype=np.int64)
+        self.rewards = np.zeros((self.memory_size, 1), dtype=np.float32)
+        self.next_states = np.zeros(shape, dtype=self.state_dtype)
+        self.dones = np.zeros((self.memory_size, 1), dtype=np.float32)
+
+    def append(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> None:
+        if self.states is None:
+            self._allocate(observation)
+
+        index = self.cursor
+        self.states[index] = observation
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_states[index] = next_observation
+        self.dones[index] = terminal
+
+        self.cursor = (index + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
+
+    def _write_indices(self, n: int) -> ndarray:
+        indices = (self.cursor + np.arange(n)) % self.memory_size
+        self.cursor = (self.cursor + n) % self.memory_size
+        self.size = min(self.size + n, self.memory_size)
+        return indices
+
+    def append_batch(
+        self, observations, actions, rewards, next_observations, terminals
+    ):
+        if self.states is None:
+            self._allocate(observations[0])
+
+        indices = self._write_indices(len(observations))
+        self.states[indices] = observations
+        self.actions[indices] = np.reshape(actions, (-1, 1))
+        self.rewards[indices] = np.reshape(rewards, (-1, 1))
+        self.next_states[indices] = next_observations
+        self.dones[indices] = np.reshape(terminals, (-1, 1))
+
+    def _sample_indices(self, batch_size: int) -> ndarray:
+        indices = self.rng.randint(0, self.size, size=batch_size)
+        if self.combined_with_last:
+            indices = np.append(indices, (self.cursor - 1) % self.memory_size)
+        return indices
+
+    def _gather(self, indices: ndarray) -> Tuple[ndarray, ...]:
+        return tuple(
+            np.take(getattr(self, field), indices, axis=0) for field in self.fields
+        )
+
+    def sample(self, batch_size):
+        batch = self._gather(self._sample_indices(batch_size))
+        return tuple(torch.from_numpy(field).to(self.device) for field in batch)
+
+    def _columns(self):
+        columns = {}
+        if self.states is not None:
+            columns = {f: getattr(self, f)[: self.size] for f in self.fields}
+        return columns, dict(cursor=self.cursor, size=self.size)
+
+    def _restore_columns(self, columns, meta):
+        size = meta["size"]
+        if size > self.memory_size:
+            raise ValueError(
+                f"Cannot load {size} transitions in a memory of size {self.memory_size}"
+            )
+
+        self.cursor = meta["cursor"] % self.memory_size
+        self.size = size
+        if not columns:
+            return
+
+        if size == self.memory_size and self.restore_in_place:
+            # a full buffer is used as loaded, without copy
+            for field in self.fields:
+                setattr(self, field, columns[field])
+        else:
+            self._allocate(columns["states"][0])
+            for field in self.fields:
+                getattr(self, field)[:size] = columns[field]
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,171 @@
+from core.memories.memory import Memory
+import numpy as np
+import torch
+
+from core.utils.params import MemoryParams
+from numpy import ndarray
+from typing import Tuple
+
+
+class FrameBuffer(Memory):
+    """Replay buffer storing each raw observation once, stacked windows are rebuilt at sample time"""
+
+    fields = ("frames", "actions", "rewards", "dones", "starts")
+    # the frames of a single environment stream are stacked at sample time
+    batched = False
+
+    def __init__(self, memory_params: MemoryParams) -> None:
+        self.combined_with_last = memory_params.combined_with_last
+        prefix = "Combined " if self.combined_with_last else ""
+        super(FrameBuffer, self).__init__(f"{prefix}Frame Buffer", memory_params)
+
+        self.cursor = 0
+        self.size = 0
+
+        self.frames = None
+        self.actions = None
+        self.rewards = None
+        self.dones = None
+        # frame i is the first frame of its episode: older frames are zero-padded
+        self.starts = None
+
+        self.last_next_observation = None
+        self.last_terminal = True
+
+        # window offsets around a sampled index: window_length past frames, current, next
+        self.offsets = np.arange(-self.window_length, 2)
+
+    def _allocate(self, observation: ndarray) -> None:
+        self.frames = np.zeros(
+            (self.memory_size, observation.size), dtype=self.state_dtype
+        )
+        self.actions = np.zeros((self.memory_size, 1), dtype=np.int64)
+        self.rewards = np.zeros((self.memory_size, 1), dtype=np.float32)
+        self.dones = np.zeros((self.memory_size, 1), dtype=np.float32)
+        self.starts = np.zeros(self.memory_size, dtype=bool)
+
+    def store(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> ndarray:
+        observation = np.asarray(observation)
+        if self.frames is None:
+            self._allocate(observation)
+
+        # an episode starts after a terminal or when the observation does not follow
+        # the previous transition (e.g. episode cut by max_steps_in_episode)
+        start = self.last_terminal or not np.array_equal(
+            observation, self.last_next_observation
+        )
+
+        index = self.cursor
+        self.frames[index] = observation.reshape(-1)
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = terminal
+        self.starts[index] = start
+
+        self.cursor = (index + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
+
+        self.last_next_observation = np.array(next_observation)
+        self.last_terminal = bool(terminal)
+
+        self.append_recent(observation, terminal)
+        return self.get_recent_states(next_observation)
+
+    def store_batch(self, *args, **kwargs):
+        # rejected when the monitor is built, see Memory.batched
+        raise NotImplementedError("frame buffer stores a single environment stream")
+
+    def append_batch(self, *args, **kwargs):
+        raise NotImplementedError("frame buffer stores a single environment stream")
+
+    def _valid(self, indices: ndarray) -> ndarray:
+        # the next frame of a non terminal transition must belong to the same episode,
+        # it is masked out by (1 - done) otherwise
+        newest = (self.cursor - 1) % self.memory_size
+        next_indices = (indices + 1) % self.memory_size
+        return (
+            (self.dones[indices, 0] > 0)
+            | (indices == newest)
+            | ~self.starts[next_indices]
+        )
+
+    def _sample_indices(self, batch_size: int) -> ndarray:
+        indices = self.rng.randint(0, self.size, size=batch_size)
+        invalid = ~self._valid(indices)
+        while invalid.any():
+            indices[invalid] = self.rng.randint(0, self.size, size=invalid.sum())
+            invalid[invalid] = ~self._valid(indices[invalid])
+
+        if self.combined_with_last:
+            indices = np.append(indices, (self.cursor - 1) % self.memory_size)
+        return indices
+
+    def _gather(self, indices: ndarray) -> Tuple[ndarray, ...]:
+        window_length = self.window_length
+        positions = (indices[:, None] + self.offsets) % self.memory_size
+        window = np.take(self.frames, positions, axis=0)
+
+        # a past frame is zeroed if an episode starts after it, or if it is older
+        # than the oldest frame still in the buffer
+        starts = self.starts[positions[:, 1 : window_length + 1]]
+        crossed = np.logical_or.accumulate(starts[:, ::-1], axis=1)[:, ::-1]
+        oldest = self.cursor if self.size == self.memory_size else 0
+        age = (indices - oldest) % self.memory_size
+        too_old = age[:, None] < np.arange(window_length, 0, -1)
+        window[:, :window_length][crossed | too_old] = 0
+
+        # the next frame of the newest transition is not written yet
+        newest = indices == (self.cursor - 1) % self.memory_size
+        window[newest, -1] = self.last_next_observation.reshape(-1)
+
+        batch_size = len(indices)
+        states = window[:, :-1].reshape(batch_size, -1)
+        next_states = window[:, 1:].reshape(batch_size, -1)
+
+        return (
+            states,
+            np.take(self.actions, indices, axis=0),
+            np.take(self.rewards, indices, axis=0),
+            next_states,
+            np.take(self.dones, indices, axis=0),
+        )
+
+    def sample(self, batch_size):
+        batch = self._gather(self._sample_indices(batch_size))
+        return tuple(torch.from_numpy(field).to(self.device) for field in batch)
+
+    def _columns(self):
+        columns = {}
+        if self.frames is not None:
+            columns = {f: getattr(self, f)[: self.size] for f in self.fields}
+            columns["last_next_observation"] = self.last_next_observation
+        meta = dict(
+            cursor=self.cursor, size=self.size, last_terminal=self.last_terminal
+        )
+        return columns, meta
+
+    def _restore_columns(self, columns, meta):
+        size = meta["size"]
+        if size > self.memory_size:
+            raise ValueError(
+                f"Cannot load {size} transitions in a memory of size {self.memory_size}"
+            )
+
+        self.cursor = meta["cursor"] % self.memory_size
+        self.size = size
+        self.last_terminal = meta["last_terminal"]
+        if columns:
+            self.last_next_observation = columns.pop("last_next_observation")
+            self._allocate(columns["frames"][0])
+            for field in self.fields:
+                getattr(self, field)[:size] = columns[field]
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,118 @@
+from core.memories.arraybuffer import ArrayBuffer
+import os
+import json
+import numpy as np
+
+from core.utils.params import MemoryParams
+from numpy import ndarray
+
+
+class MemmapBuffer(ArrayBuffer):
+    """Array buffer whose arrays are .npy files memory-mapped under the run directory.
+
+    Samples are read through the OS page cache, so the capacity is bounded by disk space
+    rather than RAM. The cursor is written to meta.json every `flush_every` appends and on
+    flush/close, and an existing buffer with the same capacity is reopened on start.
+    """
+
+    # loaded columns are copied into the mapped files
+    restore_in_place = False
+
+    def __init__(self, memory_params: MemoryParams) -> None:
+        super(MemmapBuffer, self).__init__(memory_params, "Memmap Buffer")
+
+        self.memory_dir = memory_params.memory_dir
+        self.flush_every = memory_params.memmap_flush_every
+        os.makedirs(self.memory_dir, exist_ok=True)
+
+        self.meta_file = os.path.join(self.memory_dir, "meta.json")
+        if os.path.exists(self.meta_file):
+            self._reopen()
+
+    def _path(self, field: str) -> str:
+        return os.path.join(self.memory_dir, f"{field}.npy")
+
+    def _reopen(self) -> None:
+        with open(self.meta_file) as f:
+            meta = json.load(f)
+
+        if meta["memory_size"] != self.memory_size:
+            self.logger.warning(
+                f"Memmap buffer in {self.memory_dir} has size {meta['memory_size']}, "
+                f"expected {self.memory_size}: starting from an empty buffer"
+            )
+            return
+
+        for field in self.fields:
+            setattr(self, field, np.lib.format.open_memmap(self._path(field), "r+"))
+        self.cursor = meta["cursor"]
+        self.size = meta["size"]
+        self.logger.warning(
+            f"Reopened memmap buffer {self.memory_dir} with {self.size} transitions"
+        )
+
+    def _allocate(self, observation: ndarray) -> None:
+        state_shape = (self.memory_size,) + np.shape(observation)
+        shapes = dict(
+            states=(state_shape, self.state_dtype),
+            actions=((self.memory_size, 1), np.int64),
+            rewards=((self.memory_size, 1), np.float32),
+            next_states=(state_shape, self.state_dtype),
+            dones=((self.memory_size, 1), np.float32),
+        )
+        for field in self.fields:
+            shape, dtype = shapes[field]
+            setattr(
+                self,
+                field,
+                np.lib.format.open_memmap(self._path(field), "w+", dtype, shape),
+            )
+
+    def append(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> None:
+        super(MemmapBuffer, self).append(
+            observation, action, reward, next_observation, terminal
+        )
+        if self.cursor % self.flush_every == 0:
+            self.flush()
+
+    def append_batch(
+        self, observations, actions, rewards, next_observations, terminals
+    ):
+        previous = self.cursor
+        super(MemmapBuffer, self).append_batch(
+            observations, actions, rewards, next_observations, terminals
+        )
+        # flush when the cursor went over a multiple of flush_every
+        if (
+            previous + len(observations)
+        ) // self.flush_every > previous // self.flush_every:
+            self.flush()
+
+    def _sample_indices(self, batch_size: int) -> ndarray:
+        # sorted indices read the files front to back
+        indices = np.sort(self.rng.randint(0, self.size, size=batch_size))
+        if self.combined_with_last:
+            indices = np.append(indices, (self.cursor - 1) % self.memory_size)
+        return indices
+
+    def flush(self) -> None:
+        if self.states is None:
+            return
+
+        for field in self.fields:
+            getattr(self, field).flush()
+
+        meta = dict(memory_size=self.memory_size, cursor=self.cursor, size=self.size)
+        with open(self.meta_file + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_file + ".tmp", self.meta_file)
+
+    def close(self) -> None:
+        self.flush()
@@ -1,32 +1,46 @@
 from collections import namedtuple, deque
+import os
+import json
+import shutil
 
+from core.memories.window import RollingWindow
 from core.utils.params import MemoryParams
 from numpy import float64, ndarray
-from typing import Union
+from typing import Dict, Tuple, Union
 import random
+import threading
 
 import numpy as np
 
 
 class Memory:
+    # stores transitions of several environments at once (store_batch, append_batch)
+    batched = True
+
     def __init__(self, memory_name: str, memory_params: MemoryParams) -> None:
 
         self.logger = memory_params.logger
 
         self.window_length = memory_params.window_length
 
-        self.recent_observations = deque(maxlen=self.window_length)
-        self.recent_terminals = deque(maxlen=self.window_length)
+        self.window = RollingWindow(self.window_length)
+        # one stream per environment for the batch methods, kept apart from the single window
+        # which evaluation keeps using while vectorized training episodes are in progress
+        self.batch_window = RollingWindow(self.window_length)
         self.ignore_episode_end = False
         self.memory_size = memory_params.memory_size
+        self.state_dtype = memory_params.state_dtype
         self.experience = memory_params.experience
 
         self.device = memory_params.device
 
         self.memory = deque(maxlen=self.memory_size)
+        # held while writing or sampling, when sampling happens on a prefetch thread
+        self.lock = threading.Lock()
 
         self.seed = memory_params.seed
         random.seed(self.seed)
+        self.rng = np.random.RandomState(self.seed)
         self.logger.info(
             f"-----------------------------[ {memory_name} w/ seed {self.seed} ]------------------"
         )
@@ -34,36 +48,142 @@ class Memory:
     def sample(self, batch_size):
         raise NotImplementedError("not implemented sample method in memory")
 
+    def append(self, observation, action, reward, next_observation, terminal):
+        raise NotImplementedError("not implemented append method in memory")
+
+    def close(self) -> None:
+        pass
+
+    def save(self, directory: str) -> None:
+        """Write the memory as one .npy file per column and a meta.json, nothing is pickled"""
+        # a loaded memory may still map the previous files: write new files next to them
+        # and only unlink the old ones, which keeps their mapped pages valid
+        directory = directory.rstrip("/")
+        tmp_directory = directory + ".tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        columns, meta = self._columns()
+        if self.window.frames is not None:
+            columns["window"] = self.window.frames
+        meta["window_position"] = self.window.position
+        if self.batch_window.frames is not None:
+            columns["batch_window"] = self.batch_window.frames
+            columns["batch_window_positions"] = self.batch_window.positions
+
+        _, key, position, has_gauss, gauss = self.rng.get_state()
+        columns["rng_key"] = key
+        meta["rng"] = [position, has_gauss, gauss]
+
+        meta["columns"] = sorted(columns)
+        for name, column in columns.items():
+            path = os.path.join(tmp_directory, f"{name}.npy")
+            np.save(path, column, allow_pickle=False)
+        with open(os.path.join(tmp_directory, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.rename(tmp_directory, directory)
+
+    def load(self, directory: str) -> None:
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        # copy-on-write mappings: pages are read from the files on first access only
+        columns = {
+            name: np.asarray(
+                np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="c")
+            )
+            for name in meta["columns"]
+        }
+
+        if "window" in columns:
+            self.window.frames = np.array(columns.pop("window"))
+        self.window.position = meta["window_position"]
+        if "batch_window" in columns:
+            self.batch_window.frames = np.array(columns.pop("batch_window"))
+            positions = np.array(columns.pop("batch_window_positions"))
+            self.batch_window.positions = positions
+            self.batch_window.aligned = bool((positions == positions[0]).all())
+
+        self.rng.set_state(("MT19937", columns.pop("rng_key"), *meta["rng"]))
+
+        self._restore_columns(columns, meta)
+        self.logger.warning(f"Loaded {len(self)} transitions from {directory}")
+
+    def _columns(self) -> Tuple[Dict[str, ndarray], dict]:
+        raise NotImplementedError("not implemented save method in memory")
+
+    def _restore_columns(self, columns: Dict[str, ndarray], meta: dict) -> None:
+        raise NotImplementedError("not implemented load method in memory")
+
+    def store(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> ndarray:
+        """Store a transition, returns the stacked next state (a view on the recent window)"""
+        state, next_state = self.window.transition(observation, next_observation)
+        self.append(state.reshape(-1), action, reward, next_state.reshape(-1), terminal)
+        self.window.advance(terminal)
+        return next_state
+
+    def append_batch(
+        self, observations, actions, rewards, next_observations, terminals
+    ):
+        for transition in zip(
+            observations, actions, rewards, next_observations, terminals
+        ):
+            self.append(*transition)
+
+    def store_batch(
+        self,
+        observations: ndarray,
+        actions: ndarray,
+        rewards: ndarray,
+        next_observations: ndarray,
+        terminals: ndarray,
+        resets: ndarray = None,
+        streams: ndarray = None,
+    ) -> None:
+        """Store one transition per environment, resets flags the episodes ended by a time limit too
+
+        streams are the indices of the environments in the batch, when only some of them stepped
+        """
+        n_envs = len(observations)
+        states = self.get_recent_states_batch(observations, streams=streams)
+        states = states.reshape(n_envs, -1)
+        next_states = self.get_recent_states_batch(
+            observations, next_observations, streams
+        ).reshape(n_envs, -1)
+        self.append_batch(states, actions, rewards, next_states, terminals)
+        self.append_recent_batch(
+            observations, terminals if resets is None else resets, streams
+        )
+
     def append_recent(self, observation: ndarray, terminal: bool) -> None:
-        self.recent_observations.append(observation)
-        self.recent_terminals.append(terminal)
+        self.window.append(observation, terminal)
 
-    def get_recent_states(self, current_observation, next_observation=None):
-        if current_observation.ndim == 1:
-            current_observation = current_observation.reshape(1, -1)
-        past_observations = list()
-        if next_observation is not None:
-            if next_observation.ndim == 1:
-                next_observation = next_observation.reshape(1, -1)
-            past_observations.append(next_observation)
-        past_observations.append(current_observation)
-
-        flag = False
-        for state, terminal in zip(
-            list(self.recent_observations)[::-1], list(self.recent_terminals)[::-1]
-        ):
-            if terminal or flag:
-                past_observations.append(np.zeros_like(current_observation))
-                flag = True
-            else:
-                past_observations.append(state)
+    def append_recent_batch(
+        self, observations: ndarray, terminals: ndarray, streams: ndarray = None
+    ) -> None:
+        self.batch_window.batch_append(observations, terminals, streams)
 
-        while len(past_observations) < self.window_length + 1:
-            past_observations.append(np.zeros_like(current_observation))
+    def get_recent_states(self, current_observation, next_observation=None):
+        return self.window.states(current_observation, next_observation)
 
-        past_observations = past_observations[: self.window_length + 1]
+    def get_recent_states_batch(
+        self, current_observations, next_observations=None, streams=None
+    ):
+        return self.batch_window.batch_states(
+            current_observations, next_observations, streams
+        )
 
-        return np.vstack(past_observations[::-1])
+    @property
+    def recent_observations(self) -> ndarray:
+        return self.window.history()
 
     def __len__(self):
         return len(self.memory)
@@ -0,0 +1,78 @@
+import queue
+import threading
+from time import perf_counter
+
+from core.memories.memory import Memory
+
+
+class Prefetcher:
+    """Samples minibatches from a memory on a worker thread, up to n_batches ahead of the learner.
+
+    Sampling holds the memory lock, which writers (store, update_priorities) hold as well, so a
+    batch never mixes half-written transitions. A queued batch is at most n_batches samples old.
+    An exception raised by the memory sample stops the worker and is raised again by `get`.
+    """
+
+    def __init__(self, memory: Memory, batch_size: int, n_batches: int) -> None:
+        self.memory = memory
+        self.batch_size = batch_size
+
+        self.queue = queue.Queue(maxsize=n_batches)
+        self.stop_event = threading.Event()
+
+        # time spent sampling by the worker / waiting for a batch by the learner
+        self.sample_time = 0.0
+        self.n_sampled = 0
+        self.wait_time = 0.0
+        self.n_batches = 0
+        # exception of the memory sample that stopped the worker
+        self.error = None
+
+        self.thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            start = perf_counter()
+            try:
+                with self.memory.lock:
+                    batch = self.memory.sample(self.batch_size)
+            except Exception as error:
+                self.error = error
+                self._put(error)
+                return
+            self.sample_time += perf_counter() - start
+            self.n_sampled += 1
+            self._put(batch)
+
+    def _put(self, item) -> None:
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self):
+        start = perf_counter()
+        if self.error is not None and self.queue.empty():
+            raise self.error
+        batch = self.queue.get()
+        if isinstance(batch, Exception):
+            raise batch
+        self.wait_time += perf_counter() - start
+        self.n_batches += 1
+        return batch
+
+    def hidden_latency(self) -> float:
+        """Sampling time per batch taken off the learner's critical path, in seconds"""
+        if self.n_batches == 0:
+            return 0.0
+        sample_time = self.sample_time / self.n_sampled
+        return max(0.0, sample_time - self.wait_time / self.n_batches)
+
+    def close(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
+        while not self.queue.empty():
+            self.queue.get_nowait()
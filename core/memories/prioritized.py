@@ -0,0 +1,135 @@
+from core.memories.arraybuffer import ArrayBuffer
+import numpy as np
+import torch
+
+from core.utils.params import MemoryParams
+from numpy import ndarray
+
+
+class SumTree:
+    """Array-backed binary sum-tree, node i has children 2i and 2i + 1 and the root is node 1"""
+
+    def __init__(self, capacity: int) -> None:
+        self.depth = int(np.ceil(np.log2(max(capacity, 2))))
+        self.n_leaves = 1 << self.depth
+        self.nodes = np.zeros(2 * self.n_leaves, dtype=np.float64)
+        self.levels = np.arange(self.depth + 1)
+
+    def total(self) -> float:
+        return self.nodes[1]
+
+    def get(self, indices: ndarray) -> ndarray:
+        return self.nodes[indices + self.n_leaves]
+
+    def set(self, index: int, priority: float) -> None:
+        # the leaf and all its ancestors, up to the root
+        path = (index + self.n_leaves) >> self.levels
+        self.nodes[path] += priority - self.nodes[path[0]]
+
+    def update(self, indices: ndarray, priorities: ndarray) -> None:
+        nodes = np.asarray(indices) + self.n_leaves
+        self.nodes[nodes] = priorities
+        for _ in range(self.depth):
+            # parents shared by several nodes are written several times with the same sum
+            nodes = nodes // 2
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def find(self, values: ndarray) -> ndarray:
+        # one descent for the whole batch: one level of the tree per iteration
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sums = self.nodes[left]
+            go_right = values > left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = left + go_right
+        return nodes - self.n_leaves
+
+
+class PrioritizedBuffer(ArrayBuffer):
+    def __init__(self, memory_params: MemoryParams) -> None:
+        super(PrioritizedBuffer, self).__init__(memory_params, "Prioritized Buffer")
+
+        self.alpha = memory_params.priority_alpha
+        self.beta_start = memory_params.priority_beta_start
+        self.beta_steps = memory_params.priority_beta_steps
+        self.eps = memory_params.priority_eps
+
+        self.tree = SumTree(self.memory_size)
+        self.max_priority = 1.0
+        self.counter_samples = 0
+
+    def append(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> None:
+        index = self.cursor
+        super(PrioritizedBuffer, self).append(
+            observation, action, reward, next_observation, terminal
+        )
+        self.tree.set(index, self.max_priority**self.alpha)
+
+    def append_batch(
+        self, observations, actions, rewards, next_observations, terminals
+    ):
+        indices = (self.cursor + np.arange(len(observations))) % self.memory_size
+        super(PrioritizedBuffer, self).append_batch(
+            observations, actions, rewards, next_observations, terminals
+        )
+        self.tree.update(indices, np.full(len(indices), self.max_priority**self.alpha))
+
+    def _beta(self) -> float:
+        fraction = min(1.0, self.counter_samples / self.beta_steps)
+        return self.beta_start + fraction * (1.0 - self.beta_start)
+
+    def _sample_indices(self, batch_size: int) -> ndarray:
+        # stratified proportional sampling: one value in each of batch_size equal segments
+        total = self.tree.total()
+        values = (np.arange(batch_size) + self.rng.uniform(size=batch_size)) * (
+            total / batch_size
+        )
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+        if self.combined_with_last:
+            indices = np.append(indices, (self.cursor - 1) % self.memory_size)
+        return indices
+
+    def sample(self, batch_size):
+        indices = self._sample_indices(batch_size)
+        self.counter_samples += 1
+
+        probabilities = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -self._beta()
+        weights = (weights / weights.max()).astype(np.float32).reshape(-1, 1)
+
+        batch = self._gather(indices) + (weights,)
+        return tuple(torch.from_numpy(field).to(self.device) for field in batch) + (
+            indices,
+        )
+
+    def update_priorities(self, indices: ndarray, td_errors: ndarray) -> None:
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(indices, priorities**self.alpha)
+
+    def _columns(self):
+        columns, meta = super(PrioritizedBuffer, self)._columns()
+        if columns:
+            columns["priorities"] = self.tree.get(np.arange(self.size))
+        meta.update(
+            max_priority=self.max_priority, counter_samples=self.counter_samples
+        )
+        return columns, meta
+
+    def _restore_columns(self, columns, meta):
+        priorities = columns.pop("priorities", None)
+        super(PrioritizedBuffer, self)._restore_columns(columns, meta)
+
+        self.tree = SumTree(self.memory_size)
+        if priorities is not None:
+            self.tree.update(np.arange(len(priorities)), priorities)
+        self.max_priority = meta["max_priority"]
+        self.counter_samples = meta["counter_samples"]
@@ -24,8 +24,15 @@ class ReplayBuffer(Memory):
         terminal: bool,
     ) -> None:
 
+        # stacked states may be views on the recent observations window
         self.memory.append(
-            self.experience(observation, action, reward, next_observation, terminal)
+            self.experience(
+                np.array(observation),
+                action,
+                reward,
+                np.array(next_observation),
+                terminal,
+            )
         )
 
     def sample(self, batch_size):
@@ -63,3 +70,18 @@ class ReplayBuffer(Memory):
         )
 
         return (states, actions, rewards, next_states, dones)
+
+    def _columns(self):
+        columns = {}
+        if len(self.memory) > 0:
+            for field, column in zip(self.experience._fields, zip(*self.memory)):
+                columns[field] = np.stack(column)
+        return columns, {}
+
+    def _restore_columns(self, columns, meta):
+        self.memory.clear()
+        if columns:
+            # experiences hold row views on the loaded columns
+            self.memory.extend(
+                map(self.experience, *(columns[f] for f in self.experience._fields))
+            )
@@ -0,0 +1,151 @@
+from core.memories.arraybuffer import ArrayBuffer
+import numpy as np
+import torch
+
+from core.utils.params import MemoryParams
+from numpy import ndarray
+from torch import Tensor
+from typing import Tuple
+
+
+class TensorBuffer(ArrayBuffer):
+    """Array buffer whose storage is preallocated torch tensors, on the device or in pinned host memory"""
+
+    # loaded columns are copied into the storage tensors
+    restore_in_place = False
+
+    def __init__(self, memory_params: MemoryParams) -> None:
+        super(TensorBuffer, self).__init__(memory_params, "Tensor Buffer")
+
+        self.pinned = memory_params.tensor_storage == "pinned"
+        if self.pinned and not memory_params.use_cuda:
+            self.logger.warning("Pinned tensor storage needs CUDA, storing on cpu")
+            self.pinned = False
+
+        self.storage_device = torch.device("cpu") if self.pinned else self.device
+        self.generator = torch.Generator(device=self.storage_device)
+        self.generator.manual_seed(self.seed)
+
+        # pinned batches gathered by sample, by batch length, and the event of their last copy
+        self.staging = {}
+        self.staging_copied = None
+
+    def _to_storage(self, tensor: Tensor) -> Tensor:
+        tensor = tensor.to(self.storage_device)
+        return tensor.pin_memory() if self.pinned else tensor
+
+    def _allocate(self, observation: ndarray) -> None:
+        def zeros(*shape, dtype=torch.float32):
+            return self._to_storage(torch.zeros(shape, dtype=dtype))
+
+        self.staging = {}
+        shape = (self.memory_size,) + np.shape(observation)
+        state_dtype = getattr(torch, self.state_dtype)
+        self.states = zeros(*shape, dtype=state_dtype)
+        self.actions = zeros(self.memory_size, 1, dtype=torch.int64)
+        self.rewards = zeros(self.memory_size, 1)
+        self.next_states = zeros(*shape, dtype=state_dtype)
+        self.dones = zeros(self.memory_size, 1)
+
+    def append(
+        self,
+        observation: ndarray,
+        action: int,
+        reward: float,
+        next_observation: ndarray,
+        terminal: bool,
+    ) -> None:
+        if self.states is None:
+            self._allocate(observation)
+
+        index = self.cursor
+        self.states[index] = torch.as_tensor(observation, dtype=torch.float32)
+        self.actions[index] = int(action)
+        self.rewards[index] = float(reward)
+        self.next_states[index] = torch.as_tensor(next_observation, dtype=torch.float32)
+        self.dones[index] = float(terminal)
+
+        self.cursor = (index + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
+
+    def append_batch(
+        self, observations, actions, rewards, next_observations, terminals
+    ):
+        if self.states is None:
+            self._allocate(observations[0])
+
+        def column(values, dtype=torch.float32):
+            values = torch.as_tensor(np.asarray(values), dtype=dtype)
+            return values.to(self.storage_device)
+
+        indices = column(self._write_indices(len(observations)), torch.int64)
+        self.states[indices] = column(observations, self.states.dtype)
+        self.actions[indices] = column(actions, torch.int64).view(-1, 1)
+        self.rewards[indices] = column(rewards).view(-1, 1)
+        self.next_states[indices] = column(next_observations, self.next_states.dtype)
+        self.dones[indices] = column(terminals).view(-1, 1)
+
+    def _sample_indices(self, batch_size: int) -> Tensor:
+        indices = torch.randint(
+            self.size,
+            (batch_size,),
+            generator=self.generator,
+            device=self.storage_device,
+        )
+        if self.combined_with_last:
+            last = torch.full(
+                (1,), (self.cursor - 1) % self.memory_size, device=self.storage_device
+            )
+            indices = torch.cat((indices, last.long()))
+        return indices
+
+    def _gather(self, indices: Tensor) -> Tuple[Tensor, ...]:
+        return tuple(getattr(self, f).index_select(0, indices) for f in self.fields)
+
+    def _staging(self, n: int) -> Tuple[Tensor, ...]:
+        if n not in self.staging:
+            self.staging[n] = tuple(
+                torch.empty(
+                    (n,) + getattr(self, f).shape[1:], dtype=getattr(self, f).dtype
+                ).pin_memory()
+                for f in self.fields
+            )
+        return self.staging[n]
+
+    def sample(self, batch_size):
+        indices = self._sample_indices(batch_size)
+        if not self.pinned:
+            return self._gather(indices)
+
+        # index_select on pinned storage is not pinned: gather in pinned staging tensors
+        # allocated once, then copy them asynchronously
+        staging = self._staging(len(indices))
+        if self.staging_copied is not None:
+            # the previous batch may still be copied from them
+            self.staging_copied.synchronize()
+        for field, out in zip(self.fields, staging):
+            torch.index_select(getattr(self, field), 0, indices, out=out)
+        batch = tuple(out.to(self.device, non_blocking=True) for out in staging)
+        self.staging_copied = torch.cuda.Event()
+        self.staging_copied.record()
+        return batch
+
+    def _columns(self):
+        columns, meta = super(TensorBuffer, self)._columns()
+        # numpy has no bfloat16: such columns are saved as their int16 bit patterns
+        columns = {
+            f: (column.view(torch.int16) if column.dtype == torch.bfloat16 else column)
+            .cpu()
+            .numpy()
+            for f, column in columns.items()
+        }
+        columns["generator_state"] = self.generator.get_state().numpy()
+        return columns, meta
+
+    def _restore_columns(self, columns, meta):
+        self.generator.set_state(torch.from_numpy(columns.pop("generator_state")))
+        columns = {f: torch.from_numpy(column) for f, column in columns.items()}
+        if self.state_dtype == "bfloat16" and columns:
+            for field in ("states", "next_states"):
+                columns[field] = columns[field].view(torch.bfloat16)
+        super(TensorBuffer, self)._restore_columns(columns, meta)
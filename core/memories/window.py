@@ -0,0 +1,172 @@
+import numpy as np
+
+from numpy import ndarray
+from typing import Optional, Tuple
+
+
+class RollingWindow:
+    """Preallocated window over the last observations, stacked states are served as views.
+
+    Observations are written one row after the other in a buffer a few windows long, so
+    that the last `window_length` rows followed by the current (and next) observation are
+    always contiguous. When the end of the buffer is reached, the history rows are copied
+    back to its start.
+
+    The buffer holds one stream of observations per environment: the `batch_*` methods
+    take observations with a leading environment dimension, the others use the first stream.
+    Batch methods given `streams` only touch these streams (environments stepped
+    asynchronously), their states are then gathered copies instead of views.
+    """
+
+    def __init__(self, window_length: int, n_windows: int = 32) -> None:
+        self.window_length = window_length
+        self.length = (window_length + 2) * n_windows
+
+        self.frames = None
+        self.positions = np.full(1, window_length)
+        # all streams at the same position, stacked states of the whole batch are views
+        self.aligned = True
+
+    @property
+    def position(self) -> int:
+        return int(self.positions[0])
+
+    @position.setter
+    def position(self, position: int) -> None:
+        self.positions[:] = position
+        self.aligned = True
+
+    def _allocate(self, n_streams: int, observation_size: int) -> None:
+        self.frames = np.zeros(
+            (n_streams, self.length, observation_size), dtype=np.float32
+        )
+        self.positions = np.full(n_streams, self.window_length)
+        self.aligned = True
+
+    def _check_streams(self, observations: ndarray, streams) -> ndarray:
+        observations = np.reshape(observations, (len(observations), -1))
+        if streams is None:
+            if self.frames is None or len(self.frames) != len(observations):
+                self._allocate(*observations.shape)
+        elif self.frames is None:
+            self._allocate(np.max(streams) + 1, observations.shape[1])
+        return observations
+
+    def history(self) -> ndarray:
+        if self.frames is None:
+            return np.zeros((self.window_length, 0), dtype=np.float32)
+        return self.frames[0, self.position - self.window_length : self.position]
+
+    def states(
+        self, current_observation: ndarray, next_observation: Optional[ndarray] = None
+    ) -> ndarray:
+        if self.frames is None:
+            self._allocate(1, np.size(current_observation))
+
+        position = self.position
+        self.frames[0, position] = np.reshape(current_observation, -1)
+        if next_observation is None:
+            return self.frames[0, position - self.window_length : position + 1]
+
+        self.frames[0, position + 1] = np.reshape(next_observation, -1)
+        return self.frames[0, position - self.window_length + 1 : position + 2]
+
+    def transition(
+        self, current_observation: ndarray, next_observation: ndarray
+    ) -> Tuple[ndarray, ndarray]:
+        """Stacked states of a transition, as views, writing each observation once"""
+        if self.frames is None:
+            self._allocate(1, np.size(current_observation))
+
+        position = self.position
+        self.frames[0, position] = np.reshape(current_observation, -1)
+        self.frames[0, position + 1] = np.reshape(next_observation, -1)
+        return (
+            self.frames[0, position - self.window_length : position + 1],
+            self.frames[0, position - self.window_length + 1 : position + 2],
+        )
+
+    def batch_states(
+        self,
+        current_observations: ndarray,
+        next_observations: Optional[ndarray] = None,
+        streams: Optional[ndarray] = None,
+    ) -> ndarray:
+        current_observations = self._check_streams(current_observations, streams)
+
+        if streams is None and self.aligned:
+            position = self.position
+            self.frames[:, position] = current_observations
+            if next_observations is None:
+                return self.frames[:, position - self.window_length : position + 1]
+
+            self.frames[:, position + 1] = np.reshape(
+                next_observations, current_observations.shape
+            )
+            return self.frames[:, position - self.window_length + 1 : position + 2]
+
+        if streams is None:
+            streams = np.arange(len(self.frames))
+        positions = self.positions[streams]
+        self.frames[streams, positions] = current_observations
+        offsets = np.arange(-self.window_length, 1)
+        if next_observations is not None:
+            self.frames[streams, positions + 1] = np.reshape(
+                next_observations, current_observations.shape
+            )
+            offsets = offsets + 1
+        return self.frames[streams[:, None], positions[:, None] + offsets]
+
+    def append(self, observation: ndarray, terminal: bool) -> None:
+        if self.frames is None:
+            self._allocate(1, np.size(observation))
+
+        self.frames[0, self.position] = np.reshape(observation, -1)
+        self.advance(terminal)
+
+    def advance(self, terminal: bool) -> None:
+        """Moves past the current observation, already written by `states` or `transition`"""
+        self.positions[0] += 1
+        if terminal:
+            self.reset([0])
+        if self.positions[0] + 2 > self.length:
+            self._wrap([0])
+
+    def batch_append(
+        self,
+        observations: ndarray,
+        terminals: ndarray,
+        streams: Optional[ndarray] = None,
+    ) -> None:
+        observations = self._check_streams(observations, streams)
+        if streams is None:
+            streams = np.arange(len(self.frames))
+        else:
+            self.aligned = False
+
+        self.frames[streams, self.positions[streams]] = observations
+        self.positions[streams] += 1
+        self.reset(streams[np.flatnonzero(terminals)])
+        if (self.positions[streams] + 2 > self.length).any():
+            self._wrap(streams)
+
+        if not self.aligned:
+            self.aligned = bool((self.positions == self.positions[0]).all())
+
+    def _wrap(self, streams) -> None:
+        streams = np.asarray(streams)
+        for stream in streams[self.positions[streams] + 2 > self.length]:
+            position = self.positions[stream]
+            self.frames[stream, : self.window_length] = self.frames[
+                stream, position - self.window_length : position
+            ]
+            self.positions[stream] = self.window_length
+
+    def reset(self, streams=None) -> None:
+        if self.frames is None:
+            return
+        if streams is None:
+            streams = range(len(self.frames))
+        for stream in streams:
+            position = self.positions[stream]
+            self.frames[stream, position - self.window_length : position] = 0
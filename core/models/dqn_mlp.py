@@ -41,8 +41,8 @@ class QNetwork_MLP(Model):
     def forward(self, x: Tensor) -> Tensor:
         x = F.relu(self.input_layer(x))
 
+        # hidden layers are all linear, possibly swapped for quantized ones
         for layer in self.hidden_layers:
-            if isinstance(layer, nn.Linear):
-                x = F.relu(layer(x))
+            x = F.relu(layer(x))
 
         return self.output_layer(x)
@@ -36,3 +36,27 @@ class Model(nn.Module):
 
     def print_model(self) -> None:
         self.logger.info(self)
+
+    def flatten_parameters(self, with_gradients: bool = True) -> None:
+        """Store the parameters (and gradients) in contiguous buffers, each parameter being a view
+
+        Updates over all the parameters then run as one in-place operation on the buffer. The
+        gradient views survive as long as gradients are zeroed in place (never set to None).
+        """
+        parameters = list(self.parameters())
+        self.flat_parameters = torch.cat([p.data.reshape(-1) for p in parameters])
+        self.flat_gradients = (
+            torch.zeros_like(self.flat_parameters) if with_gradients else None
+        )
+
+        offset = 0
+        for parameter in parameters:
+            size = parameter.numel()
+            parameter.data = self.flat_parameters[offset : offset + size].view_as(
+                parameter
+            )
+            if with_gradients:
+                parameter.grad = self.flat_gradients[offset : offset + size].view_as(
+                    parameter
+                )
+            offset += size
@@ -1,3 +1,4 @@
 from core.monitors.monitor import Monitor
+from core.monitors.distributed import DistributedMonitor
 
-MONITOR_DICT = {"monitor": Monitor}
+MONITOR_DICT = {"monitor": Monitor, "distributed": DistributedMonitor}
@@ -0,0 +1,311 @@
+import queue
+import multiprocessing as mp
+from time import perf_counter
+from collections import deque
+import numpy as np
+import torch
+
+from core.monitors.monitor import Monitor
+from core.memories.arraybuffer import ArrayBuffer
+
+
+def _pull_weights(model, weights, version, local_version):
+    # seqlock read: the learner makes the version odd while it writes the weights
+    published = version.value
+    if published == local_version or published % 2:
+        return local_version
+    vector = weights.clone()
+    if version.value != published:
+        return local_version
+    with torch.no_grad():
+        model.flat_parameters.copy_(vector)
+    return published
+
+
+def _put(channel, item, stop_event) -> None:
+    while not stop_event.is_set():
+        try:
+            channel.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _actor(
+    index,
+    monitor_param,
+    agent_prototype,
+    model_prototype,
+    env_prototype,
+    epsilon,
+    weights,
+    version,
+    transitions,
+    episodes,
+    stop_event,
+):
+    # forked: the parameters can be changed in place, and the actor acts on cpu
+    torch.set_num_threads(1)
+    env_params = monitor_param.env_params
+    env_params.seed = monitor_param.seed + 1 + index
+    env = env_prototype(env_params)
+
+    agent_params = monitor_param.agent_params
+    agent_params.seed = env_params.seed
+    for params in (agent_params, agent_params.memory_params):
+        params.device = torch.device("cpu")
+        params.use_cuda = False
+    # the actor memory only keeps the recent observations window
+    agent = agent_prototype(
+        agent_params=agent_params,
+        state_shape=env.get_state_shape(),
+        action_size=env.get_action_size(),
+        model_prototype=model_prototype,
+        memory_prototype=ArrayBuffer,
+    )
+    agent.eps = epsilon
+    memory = agent.memory
+
+    max_steps = monitor_param.max_steps_in_episode
+    send_every = monitor_param.actor_send_every
+    local_version = -1
+    chunk = []
+    state = env.reset()
+    episode_reward = 0.0
+    episode_steps = 0
+
+    try:
+        while not stop_event.is_set():
+            local_version = _pull_weights(agent.model, weights, version, local_version)
+
+            action = agent.act(state)
+            next_state, reward, done = env.step(action)
+            episode_reward += reward
+            episode_steps += 1
+            reset = done or episode_steps >= max_steps
+
+            chunk.append(
+                (
+                    memory.get_recent_states(state).reshape(-1).copy(),
+                    action,
+                    reward,
+                    memory.get_recent_states(state, next_state).reshape(-1).copy(),
+                    done,
+                )
+            )
+            memory.append_recent(state, reset)
+            state = next_state
+
+            if len(chunk) >= send_every:
+                states, actions, rewards, next_states, dones = zip(*chunk)
+                batch = (
+                    np.stack(states),
+                    np.array(actions, dtype=np.int64),
+                    np.array(rewards, dtype=np.float32),
+                    np.stack(next_states),
+                    np.array(dones, dtype=np.float32),
+                )
+                _put(transitions, batch, stop_event)
+                chunk = []
+
+            if reset:
+                _put(episodes, (index, episode_reward, episode_steps), stop_event)
+                state = env.reset()
+                episode_reward = 0.0
+                episode_steps = 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # unsent transitions are dropped rather than blocking the exit
+        transitions.cancel_join_thread()
+        episodes.cancel_join_thread()
+        env.close()
+
+
+class DistributedMonitor(Monitor):
+    """Trains with n_actors actor processes feeding transitions to the learner.
+
+    Each actor holds its own environment and MLPAgent copy, acting with a fixed epsilon
+    (eps_base ** (1 + alpha * i / (n_actors - 1)) for actor i), and sends its transitions
+    by chunks of actor_send_every through a multiprocessing queue. This process is the
+    learner: it stores the transitions in the memory, runs MLPAgent.learn once every
+    learn_every received transitions (replay_ratio minibatch updates each, the update to
+    data ratio of a single process run) and publishes the model weights in shared memory
+    every weights_publish_every updates, with a version counter the actors poll. Actors
+    are forked, this monitor needs Linux.
+    """
+
+    def __init__(
+        self,
+        monitor_param,
+        agent_prototype,
+        model_prototype,
+        memory_prototype,
+        env_prototype,
+    ):
+        if not memory_prototype.batched:
+            raise ValueError(
+                f"{memory_prototype.__name__} stores a single environment stream, "
+                "the learner receives batches of transitions from several actors"
+            )
+        super(DistributedMonitor, self).__init__(
+            monitor_param,
+            agent_prototype,
+            model_prototype,
+            memory_prototype,
+            env_prototype,
+        )
+        self.monitor_param = monitor_param
+        self.prototypes = (agent_prototype, model_prototype, env_prototype)
+
+        self.n_actors = monitor_param.n_actors
+        self.publish_every = monitor_param.weights_publish_every
+        self.queue_size = monitor_param.actor_queue_size
+        exponents = 1 + monitor_param.actor_eps_alpha * np.arange(self.n_actors) / max(
+            self.n_actors - 1, 1
+        )
+        self.actor_eps = monitor_param.actor_eps_base**exponents
+
+        self.context = mp.get_context("fork")
+        self.actors = []
+
+        # received transitions / learner updates, and the time spent since the actors started
+        self.n_received = 0
+        self.n_updates = 0
+        # received transitions not learned from yet
+        self.pending_steps = 0
+        self.start_time = None
+
+    def _publish_weights(self) -> None:
+        self.weights_version.value += 1
+        with torch.no_grad():
+            self.weights.copy_(self.agent.model.flat_parameters)
+        self.weights_version.value += 1
+
+    def _start_actors(self) -> None:
+        vector = self.agent.model.flat_parameters.detach().cpu()
+        self.weights = vector.clone().share_memory_()
+        self.weights_version = self.context.RawValue("q", 0)
+        self._publish_weights()
+
+        self.transitions = self.context.Queue(maxsize=self.queue_size)
+        self.episodes = self.context.Queue()
+        self.stop_event = self.context.Event()
+
+        agent_prototype, model_prototype, env_prototype = self.prototypes
+        for index in range(self.n_actors):
+            actor = self.context.Process(
+                target=_actor,
+                args=(
+                    index,
+                    self.monitor_param,
+                    agent_prototype,
+                    model_prototype,
+                    env_prototype,
+                    self.actor_eps[index],
+                    self.weights,
+                    self.weights_version,
+                    self.transitions,
+                    self.episodes,
+                    self.stop_event,
+                ),
+                name=f"actor-{index}",
+                daemon=True,
+            )
+            actor.start()
+            self.actors.append(actor)
+        self.n_received = 0
+        self.start_time = perf_counter()
+
+    def _stop_actors(self) -> None:
+        self.stop_event.set()
+        for actor in self.actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+                actor.join()
+        self.actors = []
+        for channel in (self.transitions, self.episodes):
+            channel.cancel_join_thread()
+            channel.close()
+
+    def _check_actors(self) -> None:
+        # actors run until stopped: an exit while training is a failure
+        for actor in self.actors:
+            if actor.exitcode is not None:
+                raise RuntimeError(
+                    f"Actor process {actor.name} exited with code {actor.exitcode}"
+                )
+
+    def _receive_transitions(self) -> int:
+        """Stores the transitions queued by the actors, returns how many"""
+        # wait for data only while there is not enough to learn from
+        block = (
+            len(self.agent.memory) < self.agent.batch_size
+            or self.pending_steps < self.agent.learn_every
+        )
+        received = 0
+        while True:
+            try:
+                batch = self.transitions.get(block=block, timeout=0.1)
+            except queue.Empty:
+                self._check_actors()
+                return received
+            with self.agent.memory.lock:
+                self.agent.memory.append_batch(*batch)
+            received += len(batch[0])
+            self.n_received += len(batch[0])
+            self.counter_steps += len(batch[0])
+            if self.profiler is not None:
+                self.profiler.step(self.counter_steps)
+            block = False
+
+    def _train_episodes(self):
+        losses = deque(maxlen=100)
+        while True:
+            self.pending_steps += self._receive_transitions()
+
+            # updates are bounded by the data received, not by the learner speed
+            n_learn, self.pending_steps = divmod(
+                self.pending_steps, self.agent.learn_every
+            )
+            for _ in range(n_learn):
+                loss = self.agent.learn()
+                if loss is not None:
+                    losses.append(loss)
+                    self.n_updates += 1
+                    if self.n_updates % self.publish_every == 0:
+                        self._publish_weights()
+
+            while True:
+                try:
+                    _, episode_reward, episode_steps = self.episodes.get_nowait()
+                except queue.Empty:
+                    break
+                yield episode_reward, episode_steps, np.mean(losses) if losses else None
+
+    def train(self):
+        self._start_actors()
+        try:
+            super(DistributedMonitor, self).train()
+        finally:
+            self._stop_actors()
+
+    def throughput(self):
+        """Actor environment steps and learner updates per second since the actors started"""
+        elapsed = perf_counter() - self.start_time
+        return self.n_received / elapsed, self.n_updates / elapsed
+
+    def _report_log_visual(
+        self, i_episode, resolved, start_time, rewards_window, steps_window, loss
+    ):
+        super(DistributedMonitor, self)._report_log_visual(
+            i_episode, resolved, start_time, rewards_window, steps_window, loss
+        )
+        actor_steps, learner_updates = self.throughput()
+        self.logger.info(
+            f"Training Stats: actor throughput:\t{actor_steps:.1f} steps/s ({self.n_actors} actors)"
+        )
+        self.logger.info(
+            f"Training Stats: learner throughput:\t{learner_updates:.1f} updates/s"
+        )
@@ -3,6 +3,12 @@ from datetime import datetime
 from collections import deque
 import numpy as np
 
+from core.envs.vector import VectorEnv
+from core.utils.frames import FrameEncoder
+from core.utils.profiler import TrainingProfiler
+from core.utils.publisher import VisdomPublisher
+from core.utils.timer import PhaseTimer
+
 
 class Monitor:
     def __init__(
@@ -21,9 +27,21 @@ class Monitor:
         if self.visualize:
             self.refs = monitor_param.refs
             self.visdom = monitor_param.vis
+            self.publisher = VisdomPublisher(
+                self.visdom,
+                self.refs,
+                widget_interval=monitor_param.vis_widget_interval,
+                logger=self.logger,
+            )
+        self.imsave = monitor_param.imsave
+        self.img_dir = monitor_param.img_dir
+        self.render_video = monitor_param.render_video
+        self.render_fps = monitor_param.render_fps
+        self.render_workers = monitor_param.render_workers
+        # test runs always save frames, the encoder is created by the first one without env_render
+        self.frames = None
         if self.env_render:
-            self.imsave = monitor_param.imsave
-            self.img_dir = monitor_param.img_dir
+            self._frames()
 
         self.testing_at_end_training = monitor_param.testing
 
@@ -43,12 +61,31 @@ class Monitor:
             f"Creating {{{monitor_param.env_type} | {monitor_param.game}}} w/ seed {self.seed}"
         )
 
-        self.env = env_prototype(monitor_param.env_params)
+        env_params = monitor_param.env_params
+        vectorized = getattr(env_prototype, "vectorized", False)
+        if (vectorized or env_params.num_envs > 1) and not memory_prototype.batched:
+            raise ValueError(
+                f"{memory_prototype.__name__} stores a single environment stream, it cannot "
+                f"be trained with several environments ({env_prototype.__name__}, num_envs={env_params.num_envs})"
+            )
+        if vectorized:
+            self.env = env_prototype(env_params, self.max_steps_in_episode)
+            # evaluation and testing run episodes one at a time
+            self.eval_env = self.env.make_eval_env()
+        elif env_params.num_envs > 1:
+            self.env = VectorEnv(env_prototype, env_params, self.max_steps_in_episode)
+            self.eval_env = env_prototype(env_params)
+        else:
+            self.env = env_prototype(env_params)
+            self.eval_env = self.env
+        self.vectorized = self.env is not self.eval_env
+        self.num_envs = self.env.num_envs if self.vectorized else 1
 
         state_shape = self.env.get_state_shape()
         action_size = self.env.get_action_size()
 
         self.output_filename = monitor_param.output_filename
+        self.policy_filename = monitor_param.policy_filename
 
         self.agent = agent_prototype(
             agent_params=monitor_param.agent_params,
@@ -61,6 +98,30 @@ class Monitor:
         self.actions_legend = monitor_param.actions_legend
         self._reset_log()
 
+        self.timer = PhaseTimer(monitor_param.timing)
+        self.agent.timer = self.timer
+        self.timings_filename = monitor_param.timings_filename
+
+        self.profiler = None
+        if monitor_param.profile:
+            self.profiler = TrainingProfiler(
+                monitor_param.profile_prefix,
+                monitor_param.profile_warmup,
+                monitor_param.profile_window,
+                unit=monitor_param.profile_unit,
+                sort=monitor_param.profile_sort,
+                use_cuda=monitor_param.use_cuda,
+                logger=self.logger,
+            )
+
+        self.checkpoint_filename = monitor_param.checkpoint_filename
+        self.checkpoint_freq = monitor_param.checkpoint_freq_by_episodes
+        # episode, steps and rolling windows of the checkpoint training resumes from
+        self.resumed = {}
+        if monitor_param.resume:
+            self.resumed = self.agent.load_checkpoint(self.checkpoint_filename)
+            self.counter_steps = self.resumed.get("counter_steps", 0)
+
     def _reset_log(self):
         self.summaries = {}
         for summary in [
@@ -87,27 +148,98 @@ class Monitor:
         episode_reward = 0.0
         losses = deque(maxlen=100)
 
-        for t in range(self.max_steps_in_episode):
+        with self.timer["act"]:
             action = self.agent.act(state)
-            next_state, reward, done = self.env.step(action)
-            self.agent.step(state, action, reward, next_state, done)
-
-            if self.agent.t_step == 0:
-                loss = self.agent.learn()
-                if loss is not None:
-                    losses.append(loss)
+        for t in range(self.max_steps_in_episode):
+            with self.timer["env.step"]:
+                next_state, reward, done = self.env.step(action)
+            # store, learn when due and act on next_state (timed as agent.step, learn, act)
+            next_action, loss = self.agent.step_and_act(
+                state,
+                action,
+                reward,
+                next_state,
+                done,
+                last=t + 1 == self.max_steps_in_episode,
+            )
+            if loss is not None:
+                losses.append(loss)
 
             state = next_state
+            action = next_action
 
             episode_reward += reward
             episode_steps += 1
             self.counter_steps += 1
+            if self.profiler is not None:
+                self.profiler.step(self.counter_steps)
 
             if done:
                 break
 
         return episode_reward, episode_steps, np.mean(losses)
 
+    def _train_on_vector_episodes(self):
+        """Steps all the environments together, yields (reward, steps, loss) as episodes end"""
+        states = self.env.reset().copy()
+        actions = np.zeros(self.num_envs, dtype=np.int64)
+        episode_rewards = np.zeros(self.num_envs)
+        episode_steps = np.zeros(self.num_envs, dtype=np.int64)
+        losses = deque(maxlen=100)
+
+        # environments to act on: all of them, or the first ones ready when stepped asynchronously
+        streams = self.env.ready
+        envs = slice(None) if streams is None else streams
+
+        while True:
+            with self.timer["act"]:
+                actions[envs] = self.agent.act_batch(states[envs], streams)
+            with self.timer["env.step"]:
+                next_states, rewards, dones = self.env.step(actions[envs])
+
+            streams = self.env.ready
+            envs = slice(None) if streams is None else streams
+            resets = self.env.resets[envs].copy()
+            t_step = self.agent.t_step
+            with self.timer["agent.step"]:
+                self.agent.step_batch(
+                    states[envs],
+                    actions[envs],
+                    rewards,
+                    next_states,
+                    dones,
+                    resets,
+                    streams,
+                )
+
+            # one update per learn_every environment steps, as with a single environment
+            n_updates = (t_step + len(rewards)) // self.agent.learn_every
+            for _ in range(n_updates):
+                with self.timer["learn"]:
+                    loss = self.agent.learn()
+                if loss is not None:
+                    losses.append(loss)
+
+            states[envs] = self.env.observations[envs]
+
+            episode_rewards[envs] += rewards
+            episode_steps[envs] += 1
+            self.counter_steps += len(rewards)
+            if self.profiler is not None:
+                self.profiler.step(self.counter_steps)
+
+            for i in np.arange(self.num_envs)[envs][resets]:
+                yield episode_rewards[i], episode_steps[i], np.mean(losses)
+                episode_rewards[i] = 0.0
+                episode_steps[i] = 0
+
+    def _train_episodes(self):
+        if self.vectorized:
+            yield from self._train_on_vector_episodes()
+        else:
+            while True:
+                yield self._train_on_episode()
+
     def _when_resolved(self, rewards_window, i_episode, start_time, steps_window, loss):
         self._report_log_visual(
             i_episode, True, start_time, rewards_window, steps_window, loss
@@ -115,6 +247,7 @@ class Monitor:
 
         self.logger.info(f"+-+-+-+-+-+-+-+ Saving model ... +-+-+-+-+-+-+-+")
         self.agent.save(self.output_filename)
+        self.agent.export(self.policy_filename)
 
         self.logger.warning(
             f"nununununununununununununu Evaluating @ Step {self.counter_steps}  nununununununununununununu"
@@ -138,13 +271,17 @@ class Monitor:
 
         start_time = datetime.now()
 
-        rewards_window = deque(maxlen=100)
-        steps_window = deque(maxlen=100)
+        rewards_window = deque(self.resumed.get("rewards_window", []), maxlen=100)
+        steps_window = deque(self.resumed.get("steps_window", []), maxlen=100)
+        episodes = self._train_episodes()
 
-        for i_episode in range(1, self.train_n_episodes + 1):
+        first_episode = self.resumed.get("i_episode", 0) + 1
+        for i_episode in range(first_episode, self.train_n_episodes + 1):
 
-            episode_reward, episode_steps, loss = self._train_on_episode()
+            episode_reward, episode_steps, loss = next(episodes)
             self.agent.update_epsilon()
+            if self.profiler is not None:
+                self.profiler.episode(i_episode)
 
             rewards_window.append(episode_reward)
             steps_window.append(episode_steps)
@@ -176,6 +313,37 @@ class Monitor:
                 if self.visualize:
                     self._visual()
 
+            if self.checkpoint_freq and i_episode % self.checkpoint_freq == 0:
+                self.agent.save_checkpoint(
+                    self.checkpoint_filename,
+                    meta=dict(
+                        i_episode=i_episode,
+                        counter_steps=self.counter_steps,
+                        rewards_window=[float(r) for r in rewards_window],
+                        steps_window=[int(s) for s in steps_window],
+                    ),
+                )
+
+        if self.profiler is not None:
+            # training ended inside the window: write what was profiled
+            self.profiler.stop()
+        if self.timer.enabled:
+            self.timer.export(self.timings_filename)
+        self.agent.close()
+        if self.vectorized:
+            self.env.close()
+
+    def close(self):
+        """Release the agent and the environments (worker processes of subprocess environments)"""
+        self.agent.close()
+        self.env.close()
+        if self.vectorized:
+            self.eval_env.close()
+        if self.visualize:
+            self.publisher.close()
+        if self.frames is not None:
+            self.frames.close()
+
     def _report_log_visual(
         self, i_episode, resolved, start_time, rewards_window, steps_window, loss
     ):
@@ -192,6 +360,13 @@ class Monitor:
             f"Training Stats: avg steps by episode:\t{np.mean(steps_window)}"
         )
         self.logger.info(f"Training Stats: last loss:\t{loss}")
+        if self.agent.prefetcher is not None:
+            self.logger.info(
+                f"Training Stats: prefetch hidden latency:\t{self.agent.prefetcher.hidden_latency() * 1e6:.1f} us/batch"
+            )
+        if self.timer.enabled:
+            self.timer.report(self.logger)
+            self.timer.export(self.timings_filename)
 
         if self.visualize:
             self.summaries["training_epsilon"]["log"].append(
@@ -216,7 +391,7 @@ class Monitor:
 
     def eval_agent(self):
         self.agent.training = False
-        self.env.training = False
+        self.eval_env.training = False
 
         eval_step = 0
         eval_nepisodes_solved = 0
@@ -225,16 +400,26 @@ class Monitor:
         eval_episode_reward_log = []
         eval_episode_steps_log = []
         eval_state_value_log = []
+        quantized = self.agent.quantize_eval
+        if quantized:
+            self.agent.quantize()
+            eval_states = []
+            eval_actions = []
 
-        state = self.env.reset()
+        if self.env_render:
+            self._frames().start(self.img_dir + "eval", f"{self.counter_steps:08d}")
+        state = self.eval_env.reset()
 
         while eval_step < self.eval_steps:
 
             state_processed = self.agent.memory.get_recent_states(state).flatten()
             eval_action, q_values = self.agent.get_raw_actions(state_processed)
-            next_state, reward, done = self.env.step(eval_action)
+            if quantized:
+                eval_states.append(state_processed.copy())
+                eval_actions.append(eval_action)
+            next_state, reward, done = self.eval_env.step(eval_action)
             self.agent.memory.append_recent(state, done)
-            self._render(eval_step, "eval")
+            self._render(eval_step)
             self._show_values(q_values)
 
             eval_state_value_log.append([eval_step, np.mean(q_values)])
@@ -249,10 +434,21 @@ class Monitor:
                 eval_episode_reward_log.append([eval_episode_reward])
                 eval_episode_steps = 0
                 eval_episode_reward = 0
-                state = self.env.reset()
+                state = self.eval_env.reset()
 
             eval_step += 1
 
+        if self.env_render:
+            self.frames.finish()
+        if quantized:
+            agreement, size_ratio = self.agent.quantization_report(
+                np.array(eval_states), np.array(eval_actions)
+            )
+            self.agent.dequantize()
+            self.logger.info(
+                f"@ Step {self.counter_steps}; int8 eval: greedy action agreement {agreement:.3f}, weights size x{size_ratio:.2f}"
+            )
+
         self.summaries["eval_steps_avg"]["log"].append(
             [self.counter_steps, np.mean(eval_episode_steps_log)]
         )
@@ -273,66 +469,80 @@ class Monitor:
                     f"@ Step {self.counter_steps}; {key}: {self.summaries[key]['log'][-1][1]}"
                 )
 
-    def test_agent(self, checkpoint=""):
+    def test_agent(self, checkpoint="", policy=None):
+        """Test episodes with the agent model loaded from checkpoint, or with a NumpyPolicy"""
         self.agent.training = False
-        self.env.training = False
-        self.agent.load(checkpoint)
+        self.eval_env.training = False
+        quantized = policy is None and self.agent.quantize_eval
+        if policy is None:
+            self.agent.load(checkpoint)
+        if quantized:
+            self.agent.quantize()
         self.env_render = True
+        self._frames().start(self.img_dir + "test", "test")
         step = 0
         for i in range(self.test_n_episodes):
-            state = self.env.reset()
+            state = self.eval_env.reset()
             done = False
             while not done:
-                action = self.agent.act(state)
-                next_state, reward, done = self.env.step(action)
-                self._render(step, "test")
+                if policy is None:
+                    action = self.agent.act(state)
+                else:
+                    action = policy.act(state)
+                next_state, reward, done = self.eval_env.step(action)
+                if policy is not None:
+                    policy.append_recent(state, done)
+                self._render(step)
                 state = next_state
                 step += 1
 
-    def _render(self, frame_ind, subdir):
+        self.frames.finish()
+        if quantized:
+            self.agent.dequantize()
+
+    def _frames(self) -> FrameEncoder:
+        if self.frames is None:
+            self.frames = FrameEncoder(
+                self.imsave,
+                video_format=self.render_video,
+                fps=self.render_fps,
+                workers=self.render_workers,
+                logger=self.logger,
+            )
+        return self.frames
+
+    def _render(self, frame_ind):
+        # one render per step, for the frame encoder and the visdom image when due
+        show = self.visualize and self.publisher.due("state")
+        if not (self.env_render or show):
+            return
+        with self.timer["render"]:
+            frame = self.eval_env.render()
+        if frame is None:
+            return
 
         if self.env_render:
-            frame = self.env.render()
-            if frame is not None:
-                frame_name = self.img_dir + f"{subdir}/{frame_ind:05d}.jpg"
-                self.imsave(frame_name, frame)
-
-        if self.visualize:
-            frame = self.env.render()
-            if frame is not None:
-                self.visdom.image(
+            with self.timer["render.queue"]:
+                self.frames.add(frame_ind, frame)
+        if show:
+            with self.timer["visdom"]:
+                self.publisher.widget(
+                    "state",
+                    "image",
                     np.transpose(frame, (2, 0, 1)),
-                    env=self.refs,
-                    win="state",
                     opts=dict(title="render"),
                 )
 
     def _show_values(self, values):
         if self.visualize:
-            self.visdom.bar(
-                values.T,
-                env=self.refs,
-                win="q_values",
-                opts=dict(title="q_values", legend=self.actions_legend),
-            )
+            with self.timer["visdom"]:
+                self.publisher.widget(
+                    "q_values",
+                    "bar",
+                    values.T,
+                    opts=dict(title="q_values", legend=self.actions_legend),
+                )
 
     def _visual(self):
-        for key in self.summaries.keys():
-            if self.summaries[key]["type"] == "line":
-                data = np.array(self.summaries[key]["log"])
-                if data.ndim < 2:
-                    continue
-                self.visdom.line(
-                    X=data[:, 0],
-                    Y=data[:, 1],
-                    env=self.refs,
-                    win=f"win_{key}",
-                    opts=dict(title=key),
-                )
-            elif self.summaries[key]["type"] == "text":
-                self.visdom.text(
-                    self.summaries[key]["log"],
-                    env=self.refs,
-                    win=f"win_{key}",
-                    opts=dict(title=key),
-                )
+        with self.timer["visdom"]:
+            self.publisher.summaries(self.summaries)
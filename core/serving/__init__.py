@@ -0,0 +1,2 @@
+from core.serving.policy import NumpyPolicy
+from core.serving.export import export_policy
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def export_policy(model, path: str) -> str:
+    """Write the layers of a QNetwork_MLP in an .npz file loadable by NumpyPolicy
+
+    Weights are stored transposed, (inputs, outputs) in float32, so the policy multiplies
+    the states by them directly. Nothing is pickled.
+    """
+    layers = [model.input_layer, *model.hidden_layers, model.output_layer]
+    arrays = {"hist_len": np.array(model.input_dims_0)}
+    for i, layer in enumerate(layers):
+        arrays[f"weight_{i}"] = np.ascontiguousarray(
+            layer.weight.detach().cpu().numpy().T, dtype=np.float32
+        )
+        arrays[f"bias_{i}"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+    return path
@@ -0,0 +1,62 @@
+import numpy as np
+
+from numpy import ndarray
+from typing import List, Union
+
+
+class NumpyPolicy:
+    """Greedy policy of an exported QNetwork_MLP, running on numpy only.
+
+    `act_batch` and `q_values` take stacked states, as the agent's model does. `act` takes
+    one raw observation and stacks it with the last hist_len - 1 observations given to
+    `append_recent`, as the agent memory window does.
+
+    This module imports neither torch nor the rest of core, to keep policy servers small.
+    """
+
+    def __init__(self, weights: List[ndarray], biases: List[ndarray], hist_len: int):
+        self.weights = weights
+        self.biases = biases
+        self.hist_len = hist_len
+        self.input_size = weights[0].shape[0]
+        self.action_size = weights[-1].shape[1]
+
+        self.history = np.zeros(
+            (hist_len, self.input_size // hist_len), dtype=np.float32
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyPolicy":
+        with np.load(path, allow_pickle=False) as arrays:
+            n_layers = sum(name.startswith("weight_") for name in arrays.files)
+            weights = [arrays[f"weight_{i}"] for i in range(n_layers)]
+            biases = [arrays[f"bias_{i}"] for i in range(n_layers)]
+            hist_len = int(arrays["hist_len"])
+        return cls(weights, biases, hist_len)
+
+    def q_values(self, states: ndarray) -> ndarray:
+        x = np.reshape(states, (-1, self.input_size)).astype(np.float32, copy=False)
+        for weight, bias in zip(self.weights[:-1], self.biases[:-1]):
+            x = x @ weight
+            x += bias
+            np.maximum(x, 0, out=x)
+        x = x @ self.weights[-1]
+        x += self.biases[-1]
+        return x
+
+    def act_batch(self, states: ndarray) -> ndarray:
+        return self.q_values(states).argmax(1)
+
+    def act(self, observation: ndarray) -> int:
+        self.history[-1] = np.reshape(observation, -1)
+        return int(self.act_batch(self.history)[0])
+
+    def append_recent(self, observation: ndarray, terminal: bool) -> None:
+        if self.hist_len > 1:
+            self.history[:-2] = self.history[1:-1]
+            self.history[-2] = np.reshape(observation, -1)
+        if terminal:
+            self.reset()
+
+    def reset(self) -> None:
+        self.history[:] = 0
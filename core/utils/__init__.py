@@ -1 +1,7 @@
-from core.utils.params import AgentParams, ModelParams, MemoryParams, MonitorParams
+from core.utils.params import (
+    AgentParams,
+    ModelParams,
+    MemoryParams,
+    MonitorParams,
+    RunContext,
+)
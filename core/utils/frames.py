@@ -0,0 +1,93 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import imageio
+
+VIDEO_FORMATS = ("", "mp4", "gif")
+
+
+class FrameEncoder:
+    """Encodes rendered frames in background threads, as one jpg per frame or one video by run.
+
+    `start` opens a run (an eval or a test) writing in `directory`, `add` hands over a frame
+    and returns once it is queued, `finish` waits for the frames of the run to be written.
+    Jpg frames are encoded by a pool of `workers` threads, a video by a single thread writing
+    its frames in order (mp4 needs the imageio-ffmpeg package). At most `queue_size` frames
+    wait to be encoded: `add` blocks beyond. Frames are not copied, `add` takes ownership.
+    """
+
+    def __init__(
+        self,
+        imsave=imageio.imwrite,
+        video_format: str = "",
+        fps: int = 30,
+        workers: int = 2,
+        queue_size: int = 64,
+        logger=None,
+    ) -> None:
+        if video_format not in VIDEO_FORMATS:
+            raise ValueError(
+                f"Render video format is one of {VIDEO_FORMATS}, got {video_format!r}"
+            )
+        if video_format == "mp4":
+            try:
+                import imageio_ffmpeg  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "mp4 render videos need imageio-ffmpeg: pip install imageio-ffmpeg"
+                )
+
+        self.imsave = imsave
+        self.video_format = video_format
+        self.fps = fps
+        self.logger = logger
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=1 if video_format else workers, thread_name_prefix="frames"
+        )
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.futures = []
+        self.directory = None
+        self.path = None
+        self.writer = None
+
+    def start(self, directory: str, name: str = "") -> None:
+        """Opens a run, a video is written as `<directory>/<name>.<video_format>`"""
+        self.finish()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        if self.video_format:
+            path = os.path.join(directory, f"{name}.{self.video_format}")
+            self.writer = imageio.get_writer(path, fps=self.fps)
+            self.path = path
+
+    def add(self, frame_ind: int, frame) -> None:
+        self.slots.acquire()
+        if self.writer is not None:
+            future = self.executor.submit(self.writer.append_data, frame)
+        else:
+            frame_name = os.path.join(self.directory, f"{frame_ind:05d}.jpg")
+            future = self.executor.submit(self.imsave, frame_name, frame)
+        future.add_done_callback(self._release)
+        self.futures.append(future)
+
+    def _release(self, future) -> None:
+        self.slots.release()
+
+    def finish(self) -> None:
+        """Waits for the frames of the run, and closes its video"""
+        futures, self.futures = self.futures, []
+        errors = [future.exception() for future in futures]
+        errors = [error for error in errors if error is not None]
+        if errors and self.logger:
+            self.logger.warning(
+                f"Frame encoder: {len(errors)} frames not written, {errors[0]!r}"
+            )
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def close(self) -> None:
+        self.finish()
+        self.executor.shutdown()
@@ -10,7 +10,7 @@ import torch.optim as optim
 import yaml
 
 
-class Params:
+class RunContext:
     def __init__(
         self,
         verbose: int,
@@ -20,15 +20,15 @@ class Params:
         env_render: bool = False,
         config_number: int = 0,
     ) -> None:
-        """Object params that contains all the common variables between modules like logger or GPU device
-        
+        """What the params of a run share, built once: signature, logger, visdom client, device and config.yaml entry
+
         Args:
             verbose (int): level of verbosity
             machine (str, optional): Defaults to "machine". Machine name where the algorithm is run. Used to create logging filename signature
             timestamp (str, optional): Defaults to "". Time where the algorithm is run. Used to create logging filename signature
             visualize (bool, optional): Defaults to False. Set connection to visdom dashboard if true
             env_render (bool, optional): Defaults to False. Save evaluation images in directory to used later
-        
+            config_number (int, optional): Defaults to 0. Entry of config.yaml to run
         """
 
         self.verbose = verbose  # 0 (no set) | 1 (info) | 2 (debug)
@@ -36,12 +36,8 @@ class Params:
         # signature
         self.machine = machine
         self.timestamp = timestamp
-
-        #
-        self.seed = 0
         self.visualize = visualize
         self.env_render = env_render
-        self.testing = False
 
         # prefix for saving
         self.refs = self.machine + "_" + self.timestamp
@@ -51,6 +47,7 @@ class Params:
         self.log_name = self.root_dir + "/logs/" + self.refs + ".log"
         self.logger = loggerConfig(self.log_name, self.verbose)
 
+        self.vis = None
         if self.visualize:
             self.vis = visdom.Visdom()
             self.logger.info("bash$: python3 -m visdom.server")
@@ -61,13 +58,72 @@ class Params:
         self.device = torch.device("cuda:0" if self.use_cuda else "cpu")
 
         with open("config.yaml") as f:
-            config = yaml.safe_load(f)[config_number]
-            self.agent_type = config["agent_type"]
-            self.env_type = config["env_type"]
-            self.game = config["game"]
-            self.model_type = config["model_type"]
-            self.memory_type = config["memory_type"]
-            self.actions_legend = config["actions_legend"]
+            self.config = yaml.safe_load(f)[config_number]
+
+
+class Params:
+    def __init__(
+        self,
+        verbose: int,
+        machine: str = "machine",
+        timestamp: str = "",
+        visualize: bool = False,
+        env_render: bool = False,
+        config_number: int = 0,
+        context: RunContext = None,
+    ) -> None:
+        """Object params that contains all the common variables between modules like logger or GPU device
+        
+        Args:
+            verbose (int): level of verbosity
+            machine (str, optional): Defaults to "machine". Machine name where the algorithm is run. Used to create logging filename signature
+            timestamp (str, optional): Defaults to "". Time where the algorithm is run. Used to create logging filename signature
+            visualize (bool, optional): Defaults to False. Set connection to visdom dashboard if true
+            env_render (bool, optional): Defaults to False. Save evaluation images in directory to used later
+            context (RunContext, optional): Defaults to None. Run context shared with the other params, built from the arguments above if None
+        
+        """
+
+        if context is None:
+            context = RunContext(
+                verbose, machine, timestamp, visualize, env_render, config_number
+            )
+        self.context = context
+
+        self.verbose = context.verbose
+
+        # signature
+        self.machine = context.machine
+        self.timestamp = context.timestamp
+
+        #
+        self.seed = 0
+        self.visualize = context.visualize
+        self.env_render = context.env_render
+        self.testing = False
+
+        # prefix for saving
+        self.refs = context.refs
+        self.root_dir = context.root_dir
+
+        # logging config
+        self.log_name = context.log_name
+        self.logger = context.logger
+
+        if self.visualize:
+            self.vis = context.vis
+
+        self.use_cuda = context.use_cuda
+        self.dtype = context.dtype
+        self.device = context.device
+
+        config = context.config
+        self.agent_type = config["agent_type"]
+        self.env_type = config["env_type"]
+        self.game = config["game"]
+        self.model_type = config["model_type"]
+        self.memory_type = config["memory_type"]
+        self.actions_legend = config["actions_legend"]
 
 
 class ModelParams(Params):
@@ -113,6 +169,22 @@ class MemoryParams(Params):
 
         self.combined_with_last = False
 
+        # stored states: "float32" | "float16" | "bfloat16" (tensor buffer only, numpy has no bfloat16)
+        self.state_dtype = "float32"
+
+        # tensor buffer storage: "device" (memory device) | "pinned" (page-locked host memory)
+        self.tensor_storage = "device"
+
+        # memmap buffer files, reopened when a run with the same signature restarts
+        self.memory_dir = self.root_dir + "/memories/" + self.refs + "/"
+        self.memmap_flush_every = 1000
+
+        # prioritized replay: priority exponent, importance-sampling exponent annealed to 1
+        self.priority_alpha = 0.6
+        self.priority_beta_start = 0.4
+        self.priority_beta_steps = int(1e5)
+        self.priority_eps = 1e-6
+
 
 class AgentParams(Params):
     def __init__(self, args) -> None:
@@ -126,6 +198,7 @@ class AgentParams(Params):
 
         super(AgentParams, self).__init__(**args)
 
+        args = dict(args, context=self.context)
         self.model_params = ModelParams(args)
         self.memory_params = MemoryParams(args)
 
@@ -137,7 +210,9 @@ class AgentParams(Params):
 
         self.learn_start = 500
         self.learn_every = 1
+        self.replay_ratio = 1  # minibatch updates every learn_every env steps, sampled in one call
         self.batch_size = 128
+        self.prefetch = 0  # minibatches sampled ahead on a worker thread, 0 to sample in learn
 
         self.eps_start = 1.0
         self.eps_end = 0.01
@@ -145,8 +220,10 @@ class AgentParams(Params):
 
         self.optim = optim.SGD
         self.optim_params = {"lr": 5e-5, "momentum": 0.9}
-        self.tau = 1e-3
-        self.update_every = 1
+        self.tau = 1e-3  # target network soft update rate, 1.0 for a hard copy
+        self.update_every = 1  # learn steps between target network updates
+        self.bf16 = False  # learn forward passes under bfloat16 autocast, weights and optimizer stay fp32
+        self.quantize_eval = False  # int8 Linear layers for eval and test rollouts (cpu), training stays fp32
 
         self.memory_params.window_length = self.model_params.hist_len - 1
 
@@ -167,6 +244,20 @@ class EnvParams(Params):
         self.logger.debug(f"Env env type {self.env_type}")
 
         self.pixels = False
+        self.worker_id = 0  # unity: port offset of the environment process
+        self.unity_noop_action = 0  # unity: action of the agents other than agent 0 in a single-agent UnityEnv
+
+        # environments stepped together by the training loop, > 1 uses a VectorEnv
+        self.num_envs = 1
+        # subprocess envs: step returns once this many workers are done, 0 to wait for all
+        self.ready_envs = 0
+
+        # synthetic env: observation size, actions, steps per episode, and extra cost per step
+        # (products of a 256 x 256 matrix, to emulate a costly simulator)
+        self.synthetic_obs_size = 8
+        self.synthetic_action_size = 4
+        self.synthetic_episode_length = 200
+        self.synthetic_step_cost = 0
 
 
 class MonitorParams(Params):
@@ -178,6 +269,12 @@ class MonitorParams(Params):
         visualize: bool = False,
         env_render: bool = False,
         config_number: int = 0,
+        resume: bool = False,
+        checkpoint_freq: int = 0,
+        profile: bool = False,
+        profile_warmup: int = 10,
+        profile_window: int = 5,
+        profile_unit: str = "episodes",
     ):
         """Monitor global parameters. It contains an AgentParams object and set visualisation options
         
@@ -187,6 +284,12 @@ class MonitorParams(Params):
             timestamp (str, optional): Defaults to "". Time where the algorithm is run. Used to create logging filename signature
             visualize (bool, optional): Defaults to False. Set connection to visdom dashboard if true
             env_render (bool, optional): Defaults to False. Save evaluation images in directory to used later
+            resume (bool, optional): Defaults to False. Resume training from the last checkpoint (model, optimizer, replay memory and RNG states)
+            checkpoint_freq (int, optional): Defaults to 0. Episodes between two full training checkpoints, 0 to disable
+            profile (bool, optional): Defaults to False. Profile a window of training with cProfile and the torch profiler
+            profile_warmup (int, optional): Defaults to 10. Episodes or steps trained before profiling starts
+            profile_window (int, optional): Defaults to 5. Episodes or steps profiled
+            profile_unit (str, optional): Defaults to "episodes". Unit of the warm-up and the window, "episodes" | "steps"
         """
 
         args = dict(
@@ -199,13 +302,47 @@ class MonitorParams(Params):
         )
 
         super(MonitorParams, self).__init__(**args)
+        # agent, model, memory and env params share the context built above
+        args["context"] = self.context
 
         self.output_filename = "checkpoint.pth"
+        # greedy policy exported with the model, to run with core.serving.NumpyPolicy
+        self.policy_filename = "policy.npz"
+
+        # full training checkpoint (model, optimizer, replay memory, RNG, monitor counters) every
+        # checkpoint_freq_by_episodes, 0 to disable
+        self.resume = resume
+        self.checkpoint_filename = self.refs + ".ckpt"
+        self.checkpoint_freq_by_episodes = checkpoint_freq
+
+        # "monitor" | "distributed" (actor processes feeding a learner process)
+        self.monitor_type = "monitor"
+        self.n_actors = 4
+        self.actor_eps_base = 0.4  # actor i explores with eps_base ** (1 + eps_alpha * i / (n_actors - 1))
+        self.actor_eps_alpha = 7
+        self.actor_send_every = 50  # transitions by message to the learner
+        self.actor_queue_size = 64  # messages waiting for the learner before actors block
+        self.weights_publish_every = 100  # learner updates between weights published to the actors
 
         self.train_n_episodes = 10000
         self.max_steps_in_episode = 1000
 
         self.report_freq_by_episodes = 100
+        # visdom updates are sent from a background thread, per-step widgets (q-values bar,
+        # render) at most once every vis_widget_interval seconds
+        self.vis_widget_interval = 0.5
+        # per-phase timers (act, env step, memory, learn, render, visdom), logged at each
+        # report and written as JSON next to the run log
+        self.timing = True
+        self.timings_filename = self.root_dir + "/logs/" + self.refs + ".timings.json"
+        # cProfile + torch profiler over a window of training, written as
+        # logs/<refs>.profile.txt (sorted stats), logs/<refs>.prof and logs/<refs>.trace.json
+        self.profile = profile
+        self.profile_warmup = profile_warmup
+        self.profile_window = profile_window
+        self.profile_unit = profile_unit
+        self.profile_sort = "cumulative"
+        self.profile_prefix = self.root_dir + "/logs/" + self.refs
         self.eval_during_training = True
         self.eval_freq_by_episodes = 100
         self.eval_steps = 1000
@@ -218,6 +355,11 @@ class MonitorParams(Params):
         self.agent_params = AgentParams(args)
         self.env_params = EnvParams(args)
 
-        if self.env_render:
-            self.img_dir = self.root_dir + "/imgs/"
-            self.imsave = imageio.imwrite
+        # eval frames are saved with env_render, test frames always
+        self.img_dir = self.root_dir + "/imgs/"
+        self.imsave = imageio.imwrite
+        # frames are encoded in background threads, one jpg per frame under imgs/<eval|test>/,
+        # or one video per eval / test run with "mp4" (needs imageio-ffmpeg) | "gif"
+        self.render_video = ""
+        self.render_fps = 30
+        self.render_workers = 2
@@ -0,0 +1,94 @@
+import cProfile
+import pstats
+
+from torch.profiler import ProfilerActivity, profile
+
+UNITS = ("episodes", "steps")
+
+
+class TrainingProfiler:
+    """Runs cProfile and the torch profiler over a window of training episodes or steps.
+
+    The monitor reports its counters with `episode` and `step`: profiling starts once `warmup`
+    units are done and stops `window` units later. It then writes `<prefix>.profile.txt`
+    (cProfile stats sorted by `sort`), `<prefix>.prof` (raw stats, for pstats or snakeviz) and
+    `<prefix>.trace.json` (torch Chrome trace, to open in chrome://tracing or Perfetto).
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        warmup: int,
+        window: int,
+        unit: str = "episodes",
+        sort: str = "cumulative",
+        use_cuda: bool = False,
+        logger=None,
+    ) -> None:
+        if unit not in UNITS:
+            raise ValueError(f"Profiling unit is one of {UNITS}, got {unit!r}")
+        self.stats_filename = prefix + ".profile.txt"
+        self.raw_filename = prefix + ".prof"
+        self.trace_filename = prefix + ".trace.json"
+        self.start_at = warmup
+        self.stop_at = warmup + window
+        self.unit = unit
+        self.sort = sort
+        self.logger = logger
+
+        self.activities = [ProfilerActivity.CPU]
+        if use_cuda:
+            self.activities.append(ProfilerActivity.CUDA)
+
+        self.running = False
+        self.done = False
+        self.counter = 0
+        self.cprofile = None
+        self.torch_profile = None
+
+    def episode(self, counter: int) -> None:
+        if self.unit == "episodes":
+            self._update(counter)
+
+    def step(self, counter: int) -> None:
+        if self.unit == "steps":
+            self._update(counter)
+
+    def _update(self, counter: int) -> None:
+        if self.done:
+            return
+        self.counter = counter
+        if not self.running and counter >= self.start_at:
+            self.start()
+        elif self.running and counter >= self.stop_at:
+            self.stop()
+
+    def start(self) -> None:
+        if self.logger:
+            self.logger.info(f"Profiling: start @ {self.unit[:-1]} {self.counter}")
+        self.torch_profile = profile(activities=self.activities)
+        self.torch_profile.start()
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+        self.running = True
+
+    def stop(self) -> None:
+        """Stops a running profile and writes its files, the window is not restarted"""
+        if not self.running:
+            return
+        self.cprofile.disable()
+        self.torch_profile.stop()
+        self.running = False
+        self.done = True
+
+        with open(self.stats_filename, "w") as f:
+            stats = pstats.Stats(self.cprofile, stream=f)
+            stats.sort_stats(self.sort).print_stats()
+        self.cprofile.dump_stats(self.raw_filename)
+        self.torch_profile.export_chrome_trace(self.trace_filename)
+
+        if self.logger:
+            self.logger.info(f"Profiling: stop @ {self.unit[:-1]} {self.counter}")
+            self.logger.info(
+                f"Profiling: stats in {self.stats_filename}, trace in {self.trace_filename}"
+            )
@@ -0,0 +1,141 @@
+import threading
+from time import perf_counter
+
+import numpy as np
+
+
+class VisdomPublisher:
+    """Sends monitor summaries and widgets to visdom from a background thread.
+
+    `summaries` hands over the monitor summaries dict: the thread sends only the points
+    appended to each line since its last send (`update="append"`), resends a line whose log
+    list was replaced, and a text when it changed. `widget` queues a per-step widget call
+    (q-values bar, render image), at most one every `widget_interval` seconds per window.
+
+    Pending work is bounded: one summaries snapshot and the latest call per widget window,
+    a newer update replaces a stale one not sent yet (counted in `dropped`).
+    """
+
+    def __init__(self, vis, env: str, widget_interval: float = 0.5, logger=None):
+        self.vis = vis
+        self.env = env
+        self.widget_interval = widget_interval
+        self.logger = logger
+
+        # window -> time of its last queued update
+        self.last_widget = {}
+        self.dropped = 0
+
+        # points already sent by line window, with the log list they were read from
+        self.sent = {}
+        self.texts = {}
+
+        self.pending_summaries = None
+        self.pending_widgets = {}
+        self.condition = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self._run, name="visdom-publisher", daemon=True
+        )
+        self.thread.start()
+
+    def due(self, win: str) -> bool:
+        """Whether a widget update of this window would be sent now, to skip preparing it"""
+        return (
+            perf_counter() - self.last_widget.get(win, -np.inf) >= self.widget_interval
+        )
+
+    def widget(self, win: str, method: str, *args, **kwargs) -> bool:
+        """Queues `vis.<method>(*args, win=win, env=env, **kwargs)`, False when throttled"""
+        if not self.due(win):
+            return False
+        self.last_widget[win] = perf_counter()
+        with self.condition:
+            if win in self.pending_widgets:
+                self.dropped += 1
+            self.pending_widgets[win] = (method, args, kwargs)
+            self.condition.notify()
+        return True
+
+    def summaries(self, summaries: dict) -> None:
+        with self.condition:
+            self.pending_summaries = summaries
+            self.condition.notify()
+
+    def flush(self) -> None:
+        """Blocks until the pending updates are sent"""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: not (
+                    self.busy
+                    or self.pending_widgets
+                    or self.pending_summaries is not None
+                )
+            )
+
+    def close(self) -> None:
+        """Sends the pending updates and stops the thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.closed
+                    or self.pending_widgets
+                    or self.pending_summaries is not None
+                )
+                if not self.pending_widgets and self.pending_summaries is None:
+                    return
+                widgets, self.pending_widgets = self.pending_widgets, {}
+                summaries, self.pending_summaries = self.pending_summaries, None
+                self.busy = True
+
+            try:
+                for win, (method, args, kwargs) in widgets.items():
+                    getattr(self.vis, method)(*args, win=win, env=self.env, **kwargs)
+                if summaries is not None:
+                    self._send_summaries(summaries)
+            except Exception as error:
+                # the dashboard is best effort, training goes on without it
+                if self.logger:
+                    self.logger.warning(f"Visdom publisher: {error!r}")
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def _send_summaries(self, summaries: dict) -> None:
+        for key, summary in summaries.items():
+            win = f"win_{key}"
+            if summary["type"] == "line":
+                self._send_line(key, win, summary["log"])
+            elif summary["type"] == "text" and summary["log"] != self.texts.get(win):
+                self.texts[win] = summary["log"]
+                self.vis.text(
+                    summary["log"], env=self.env, win=win, opts=dict(title=key)
+                )
+
+    def _send_line(self, key: str, win: str, log: list) -> None:
+        sent_log, n_sent = self.sent.get(win, (None, 0))
+        if sent_log is not log:
+            n_sent = 0
+        points = log[n_sent:]
+        if not points:
+            return
+        data = np.array(points)
+        if data.ndim < 2:
+            return
+        if n_sent:
+            self.vis.line(
+                X=data[:, 0], Y=data[:, 1], env=self.env, win=win, update="append"
+            )
+        else:
+            self.vis.line(
+                X=data[:, 0], Y=data[:, 1], env=self.env, win=win, opts=dict(title=key)
+            )
+        self.sent[win] = (log, n_sent + len(points))
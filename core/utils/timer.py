@@ -0,0 +1,93 @@
+import json
+from time import perf_counter
+
+from typing import Dict
+
+# histogram buckets: bucket i counts durations in [2 ** (i - 1), 2 ** i) microseconds
+N_BUCKETS = 32
+
+
+class Phase:
+    """Context manager accumulating the wall time of one phase: calls, total and a log2 histogram"""
+
+    __slots__ = ("calls", "total", "histogram", "start")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.histogram = [0] * N_BUCKETS
+        self.start = 0.0
+
+    def __enter__(self) -> "Phase":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        duration = perf_counter() - self.start
+        self.calls += 1
+        self.total += duration
+        self.histogram[min(int(duration * 1e6).bit_length(), N_BUCKETS - 1)] += 1
+
+    def summary(self) -> dict:
+        return dict(
+            calls=self.calls,
+            total_s=self.total,
+            mean_us=self.total / self.calls * 1e6 if self.calls else 0.0,
+            histogram_us={
+                f"<{2 ** i}": count for i, count in enumerate(self.histogram) if count
+            },
+        )
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+class PhaseTimer:
+    """Wall time per named phase, `with timer["act"]: ...` around the code of the phase.
+
+    Phases are created on first use. Nested phases are timed independently, a phase named
+    "learn.sample" is a part of "learn". A disabled timer returns a shared no-op context.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases: Dict[str, Phase] = {}
+        self.start = perf_counter()
+
+    def __getitem__(self, name: str):
+        if not self.enabled:
+            return _NO_PHASE
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase()
+        return phase
+
+    def summary(self) -> dict:
+        elapsed = perf_counter() - self.start
+        return dict(
+            elapsed_s=elapsed,
+            phases={
+                name: dict(phase.summary(), share=phase.total / elapsed)
+                for name, phase in sorted(self.phases.items())
+            },
+        )
+
+    def report(self, logger) -> None:
+        for name, phase in self.summary()["phases"].items():
+            logger.info(
+                f"Timing: {name:<16}\t{phase['calls']} calls\t{phase['mean_us']:.1f} us\t{phase['share']:.1%} of wall time"
+            )
+
+    def export(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
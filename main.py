@@ -1,4 +1,4 @@
-from core.monitors import Monitor
+from core.monitors import MONITOR_DICT
 from core.agents import AGENT_DICT
 from core.utils import MonitorParams
 from core.models import MODEL_DICT
@@ -18,11 +18,17 @@ def cli():
 @click.option('--vis', 'visualize', is_flag=True, help='Visualize metrics/plots with visdom')
 @click.option('--render', 'env_render', is_flag=True, help='Save environment render in imgs/ dir')
 @click.option('--config', 'config_number', type=int, default=0, help='Choose config from config.yaml to run')
+@click.option('--resume', 'resume', is_flag=True, help='Resume training from the checkpoint saved under models/ for this signature')
+@click.option('--checkpoint-freq', 'checkpoint_freq', type=int, default=0, help='Save a full training checkpoint (model, optimizer, replay memory, counters) every N episodes, 0 to disable')
+@click.option('--profile', 'profile', is_flag=True, help='Profile a window of training with cProfile and the torch profiler, written in logs/ for this signature')
+@click.option('--profile-warmup', 'profile_warmup', type=int, default=10, help='Episodes (or steps) trained before profiling starts')
+@click.option('--profile-window', 'profile_window', type=int, default=5, help='Episodes (or steps) profiled')
+@click.option('--profile-unit', 'profile_unit', type=click.Choice(['episodes', 'steps']), default='episodes', help='Unit of --profile-warmup and --profile-window')
 def train(**args):
     click.echo(f'{args}')
     options = MonitorParams(**args) 
 
-    monitor = Monitor(
+    monitor = MONITOR_DICT[options.monitor_type](
         monitor_param=options,
         agent_prototype=AGENT_DICT[options.agent_type],
         model_prototype=MODEL_DICT[options.model_type],
@@ -31,6 +37,7 @@ def train(**args):
     )
 
     monitor.train()
+    monitor.close()
 
 @cli.command()
 def test():
@@ -0,0 +1,170 @@
+from itertools import product
+import numpy as np
+
+from core.utils.params import AgentParams
+from core.models.dqn_mlp import QNetwork_MLP
+from core.memories import ReplayBuffer, MEMORY_DICT
+from core.agents import MLPAgent
+from harness import measure
+
+ACTION_SIZE = 4
+
+
+# (bf16 autocast, stored state dtype), bfloat16 states are kept by the tensor buffer only
+PRECISIONS = (
+    (False, "float32"),
+    (True, "float32"),
+    (True, "float16"),
+    (True, "bfloat16"),
+)
+
+
+def _agent(
+    obs_dim,
+    hist_len,
+    hidden_dim=None,
+    memory_prototype=ReplayBuffer,
+    bf16=False,
+    state_dtype="float32",
+):
+    params = AgentParams({"verbose": 0})
+    params.model_params.hist_len = hist_len
+    params.memory_params.window_length = hist_len - 1
+    params.memory_params.state_dtype = state_dtype
+    params.bf16 = bf16
+    if hidden_dim is not None:
+        params.model_params.hidden_dim = hidden_dim
+    return MLPAgent(params, (obs_dim,), ACTION_SIZE, QNetwork_MLP, memory_prototype)
+
+
+def bench_act(obs_dims, hist_lens):
+    results = []
+    for obs_dim, hist_len in product(obs_dims, hist_lens):
+        agent = _agent(obs_dim, hist_len)
+        agent.training = False
+        observation = np.random.randn(obs_dim).astype(np.float32)
+        results.append(
+            measure(
+                "MLPAgent.act",
+                lambda: agent.act(observation),
+                obs_dim=obs_dim,
+                hist_len=hist_len,
+            )
+        )
+    return results
+
+
+def _fill(agent, n, state_size):
+    states = np.random.randn(n, state_size).astype(np.float32)
+    agent.memory.append_batch(
+        states,
+        np.random.randint(ACTION_SIZE, size=n),
+        np.random.randn(n),
+        states,
+        np.zeros(n, dtype=bool),
+    )
+
+
+def bench_act_quantized(hidden_dims, obs_dim=8, n_states=1000):
+    """Greedy act at batch size 1 with the fp32 model and its int8 dynamic quantization
+
+    The int8 record also holds its speedup over fp32 and MLPAgent.quantization_report
+    on random states: the greedy action agreement and the weights size ratio.
+    """
+    results = []
+    for hidden_dim in hidden_dims:
+        agent = _agent(obs_dim, 1, hidden_dim)
+        agent.training = False
+        observation = np.random.randn(obs_dim).astype(np.float32)
+        fp32 = measure(
+            "MLPAgent.act",
+            lambda: agent.act(observation),
+            hidden_dim=hidden_dim,
+            quantized=False,
+        )
+        agent.quantize()
+        int8 = measure(
+            "MLPAgent.act",
+            lambda: agent.act(observation),
+            hidden_dim=hidden_dim,
+            quantized=True,
+        )
+        states = np.random.randn(n_states, obs_dim).astype(np.float32)
+        agreement, size_ratio = agent.quantization_report(states)
+        int8.update(
+            speedup=int8["per_second"] / fp32["per_second"],
+            agreement=float(agreement),
+            size_ratio=size_ratio,
+        )
+        results += [fp32, int8]
+    return results
+
+
+def bench_learn(obs_dims, hist_lens):
+    results = []
+    for obs_dim, hist_len in product(obs_dims, hist_lens):
+        agent = _agent(obs_dim, hist_len)
+        _fill(agent, agent.batch_size * 10, obs_dim * hist_len)
+        results.append(
+            measure(
+                "MLPAgent.learn",
+                agent.learn,
+                repeat=3,
+                obs_dim=obs_dim,
+                hist_len=hist_len,
+                batch_size=agent.batch_size,
+            )
+        )
+    return results
+
+
+def bench_learn_precision(hidden_dims, obs_dim=32):
+    """Updates per second with bf16 autocast and 16-bit stored states, against fp32"""
+    results = []
+    for hidden_dim, (bf16, state_dtype) in product(hidden_dims, PRECISIONS):
+        memory_type = "tensorbuffer" if state_dtype == "bfloat16" else "arraybuffer"
+        agent = _agent(
+            obs_dim, 1, hidden_dim, MEMORY_DICT[memory_type], bf16, state_dtype
+        )
+        _fill(agent, agent.batch_size * 10, obs_dim)
+        results.append(
+            measure(
+                "MLPAgent.learn",
+                agent.learn,
+                repeat=3,
+                hidden_dim=hidden_dim,
+                bf16=bf16,
+                state_dtype=state_dtype,
+                memory_type=memory_type,
+                batch_size=agent.batch_size,
+            )
+        )
+    return results
+
+
+def bench_soft_update(hidden_dims):
+    results = []
+    for hidden_dim in hidden_dims:
+        agent = _agent(8, 4, hidden_dim)
+        results.append(
+            measure(
+                "MLPAgent._soft_update_target_model",
+                agent._soft_update_target_model,
+                hidden_dim=hidden_dim,
+                parameters=agent.model.flat_parameters.numel(),
+            )
+        )
+    return results
+
+
+def run(quick: bool = False) -> list:
+    obs_dims = (8,) if quick else (8, 64, 256)
+    hist_lens = (1, 4) if quick else (1, 4, 8)
+    hidden_dims = ([64, 64],) if quick else ([64, 64], [256, 1024, 256])
+    return (
+        bench_act(obs_dims, hist_lens)
+        + bench_act_quantized(hidden_dims)
+        + bench_learn(obs_dims, hist_lens)
+        + bench_learn_precision(hidden_dims)
+        + bench_soft_update(hidden_dims)
+    )
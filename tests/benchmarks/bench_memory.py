@@ -0,0 +1,90 @@
+from itertools import product
+import numpy as np
+
+from core.utils.params import MemoryParams
+from core.memories import ReplayBuffer, ArrayBuffer
+from harness import measure
+
+BATCH_SIZE = 128
+
+
+def _memory(memory_prototype, window_length=0, memory_size=int(1e5)):
+    params = MemoryParams({"verbose": 0})
+    params.window_length = window_length
+    params.memory_size = memory_size
+    return memory_prototype(params)
+
+
+def _fill(memory, n, state_size):
+    states = np.random.randn(n, state_size).astype(np.float32)
+    memory.append_batch(
+        states,
+        np.random.randint(4, size=n),
+        np.random.randn(n),
+        states,
+        np.zeros(n, dtype=bool),
+    )
+
+
+def bench_recent_states(obs_dims, hist_lens):
+    results = []
+    for obs_dim, hist_len in product(obs_dims, hist_lens):
+        memory = _memory(ReplayBuffer, hist_len - 1)
+        observation = np.random.randn(obs_dim).astype(np.float32)
+        for _ in range(hist_len):
+            memory.append_recent(observation, False)
+        results.append(
+            measure(
+                "Memory.get_recent_states",
+                lambda: memory.get_recent_states(observation),
+                obs_dim=obs_dim,
+                hist_len=hist_len,
+            )
+        )
+    return results
+
+
+def bench_append(obs_dims, hist_lens):
+    results = []
+    for obs_dim, hist_len in product(obs_dims, hist_lens):
+        memory = _memory(ReplayBuffer, memory_size=int(1e4))
+        state = np.random.randn(obs_dim * hist_len).astype(np.float32)
+        results.append(
+            measure(
+                "ReplayBuffer.append",
+                lambda: memory.append(state, 1, 0.5, state, False),
+                obs_dim=obs_dim,
+                hist_len=hist_len,
+            )
+        )
+    return results
+
+
+def bench_sample(obs_dims, fills):
+    results = []
+    for memory_prototype, obs_dim, fill in product(
+        (ReplayBuffer, ArrayBuffer), obs_dims, fills
+    ):
+        memory = _memory(memory_prototype, memory_size=fill)
+        _fill(memory, fill, obs_dim)
+        results.append(
+            measure(
+                f"{memory_prototype.__name__}.sample",
+                lambda: memory.sample(BATCH_SIZE),
+                obs_dim=obs_dim,
+                fill=fill,
+                batch_size=BATCH_SIZE,
+            )
+        )
+    return results
+
+
+def run(quick: bool = False) -> list:
+    obs_dims = (8, 64) if quick else (8, 64, 256)
+    hist_lens = (1, 4) if quick else (1, 4, 8)
+    fills = (1000,) if quick else (1000, 10000, 50000)
+    return (
+        bench_recent_states(obs_dims, hist_lens)
+        + bench_append(obs_dims, hist_lens)
+        + bench_sample(obs_dims, fills)
+    )
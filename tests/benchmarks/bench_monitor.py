@@ -0,0 +1,116 @@
+from itertools import product
+from time import perf_counter
+
+import numpy as np
+
+from core.utils.params import MonitorParams
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+def bench_train_on_episode(env_types, memory_types, n_episodes, max_steps):
+    """Env steps and learning updates per second of Monitor._train_on_episode, after a warm-up episode"""
+    results = []
+    for env_type, memory_type in product(env_types, memory_types):
+        params = MonitorParams(verbose=0, machine="bench", visualize=False)
+        params.max_steps_in_episode = max_steps
+        params.env_type = env_type
+        monitor = Monitor(
+            monitor_param=params,
+            agent_prototype=AGENT_DICT[params.agent_type],
+            model_prototype=MODEL_DICT[params.model_type],
+            memory_prototype=MEMORY_DICT[memory_type],
+            env_prototype=ENV_DICT[params.env_type],
+        )
+        monitor._train_on_episode()
+
+        steps, updates = monitor.counter_steps, monitor.agent.learn_step
+        start = perf_counter()
+        for _ in range(n_episodes):
+            monitor._train_on_episode()
+            monitor.agent.update_epsilon()
+        elapsed = perf_counter() - start
+        steps = monitor.counter_steps - steps
+        updates = monitor.agent.learn_step - updates
+        monitor.close()
+
+        results.append(
+            dict(
+                name="Monitor._train_on_episode",
+                params=dict(
+                    env_type=env_type,
+                    memory_type=memory_type,
+                    episodes=n_episodes,
+                    max_steps_in_episode=max_steps,
+                ),
+                seconds=elapsed,
+                env_steps=steps,
+                updates=updates,
+                env_steps_per_second=steps / elapsed,
+                updates_per_second=updates / elapsed,
+            )
+        )
+    return results
+
+
+def bench_precision(env_type, n_episodes, max_steps, seed=123):
+    """Training speed and final reward with and without bf16 autocast, from the same seed"""
+    results = []
+    for bf16 in (False, True):
+        params = MonitorParams(verbose=0, machine="bench", visualize=False)
+        params.seed = seed
+        params.max_steps_in_episode = max_steps
+        params.env_type = env_type
+        params.agent_params.bf16 = bf16
+        monitor = Monitor(
+            monitor_param=params,
+            agent_prototype=AGENT_DICT[params.agent_type],
+            model_prototype=MODEL_DICT[params.model_type],
+            memory_prototype=MEMORY_DICT[params.memory_type],
+            env_prototype=ENV_DICT[params.env_type],
+        )
+
+        rewards = []
+        start = perf_counter()
+        for _ in range(n_episodes):
+            reward, _, _ = monitor._train_on_episode()
+            monitor.agent.update_epsilon()
+            rewards.append(reward)
+        elapsed = perf_counter() - start
+        monitor.close()
+
+        last = rewards[-max(1, n_episodes // 4) :]
+        results.append(
+            dict(
+                name="Monitor._train_on_episode",
+                params=dict(
+                    env_type=env_type,
+                    bf16=bf16,
+                    episodes=n_episodes,
+                    max_steps_in_episode=max_steps,
+                    seed=seed,
+                ),
+                seconds=elapsed,
+                env_steps=monitor.counter_steps,
+                updates=monitor.agent.learn_step,
+                updates_per_second=monitor.agent.learn_step / elapsed,
+                final_reward=float(np.mean(last)),
+            )
+        )
+    return results
+
+
+def run(quick: bool = False) -> list:
+    if quick:
+        return bench_train_on_episode(
+            ("synthetic",), ("arraybuffer",), n_episodes=1, max_steps=200
+        ) + bench_precision("synthetic", n_episodes=2, max_steps=200)
+    return bench_train_on_episode(
+        ("gym", "synthetic"),
+        ("replaybuffer", "arraybuffer"),
+        n_episodes=5,
+        max_steps=1000,
+    ) + bench_precision("gym", n_episodes=80, max_steps=1000)
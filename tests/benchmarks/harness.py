@@ -0,0 +1,45 @@
+import json
+import os
+import platform
+import timeit
+from datetime import datetime
+
+import numpy as np
+import torch
+
+
+def measure(name: str, function, repeat: int = 5, **params) -> dict:
+    """Time per call of function, best and mean over repeat runs of a calibrated number of calls"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    durations = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return dict(
+        name=name,
+        params=params,
+        calls=number * repeat,
+        best_us=durations.min() * 1e6,
+        mean_us=durations.mean() * 1e6,
+        per_second=1 / durations.min(),
+    )
+
+
+def environment() -> dict:
+    return dict(
+        date=datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        torch=torch.__version__,
+        torch_threads=torch.get_num_threads(),
+        cpus=os.cpu_count(),
+        machine=platform.machine(),
+    )
+
+
+def write(results: list, path: str = None) -> str:
+    report = json.dumps(dict(environment=environment(), results=results), indent=2)
+    if path is None:
+        print(report)
+    else:
+        with open(path, "w") as f:
+            f.write(report)
+    return report
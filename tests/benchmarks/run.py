@@ -0,0 +1,54 @@
+"""Runs the training hot path benchmarks on cpu and writes their results as JSON
+
+python tests/benchmarks/run.py [--quick] [--only memory,agent,monitor] [--output results.json]
+"""
+
+import importlib
+import os
+import sys
+
+# the benchmark modules sit next to this script, the core package at the repository root
+sys.path.insert(
+    1, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+import click
+import torch
+
+from harness import write
+
+SUITES = ("memory", "agent", "monitor")
+
+
+def run(suites=SUITES, quick: bool = False) -> list:
+    results = []
+    for suite in suites:
+        module = importlib.import_module(f"bench_{suite}")
+        results += module.run(quick)
+    return results
+
+
+@click.command()
+@click.option(
+    "--quick", is_flag=True, help="Fewer sizes and shorter runs, as a smoke test"
+)
+@click.option(
+    "--only", type=str, default=",".join(SUITES), help="Comma separated suites to run"
+)
+@click.option(
+    "--output", type=str, default=None, help="JSON file to write, stdout if not given"
+)
+@click.option(
+    "--threads",
+    type=int,
+    default=0,
+    help="torch intra-op threads, 0 for torch's default",
+)
+def main(quick, only, output, threads):
+    if threads:
+        torch.set_num_threads(threads)
+    write(run(only.split(","), quick), output)
+
+
+if __name__ == "__main__":
+    main()
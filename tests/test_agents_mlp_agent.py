@@ -3,8 +3,11 @@ import unittest
 from core.utils.params import AgentParams
 from core.models.dqn_mlp import QNetwork_MLP
 from core.memories.replaybuffer import ReplayBuffer
+from core.memories.prioritized import PrioritizedBuffer
+from core.memories.arraybuffer import ArrayBuffer
 from core.agents import MLPAgent
 import numpy as np
+import torch
 
 
 @pytest.fixture
@@ -35,3 +38,221 @@ def test_step_add_in_memory(agent):
     done = False
     agent.step(state, action, reward, next_state, done)
     assert len(agent.memory) == 1
+
+
+def test_step_and_act(agent):
+    state = np.zeros((4,))
+    next_state = np.ones((4,))
+    action, loss = agent.step_and_act(state, 0, 0, next_state, False)
+    assert len(agent.memory) == 1
+    assert action in range(2)
+    assert loss is None
+    assert (agent.memory.recent_observations[-1] == state).all()
+    assert agent.step_and_act(next_state, action, 0, state, True)[0] is None
+
+
+class CountingFrames(np.ndarray):
+    writes = 0
+
+    def __setitem__(self, key, value):
+        CountingFrames.writes += 1
+        super(CountingFrames, self).__setitem__(key, value)
+
+
+def test_step_and_act_writes_window_once(agent):
+    agent.training = False
+    observations = [np.full((4,), i, dtype=np.float32) for i in range(6)]
+    agent.step(observations[0], 0, 0, observations[1], False)
+    window = agent.memory.window
+    window.frames = window.frames.view(CountingFrames)
+
+    CountingFrames.writes = 0
+    action, _ = agent.step_and_act(observations[1], 0, 0, observations[2], False)
+    # one write of the current and of the next observation rows, none to act
+    assert CountingFrames.writes == 2
+
+    stacked = agent.memory.get_recent_states(observations[2]).reshape(-1)
+    assert action == agent.get_raw_actions(stacked)[0]
+
+
+def test_checkpoint_roundtrip(agent, tmp_path):
+    agent.model_dir = str(tmp_path) + "/"
+    for i in range(5):
+        agent.step(np.full((4,), i), i % 2, 1.0, np.full((4,), i + 1), False)
+    agent.eps = 0.5
+    agent.save_checkpoint("run.ckpt")
+    expected = np.random.uniform()
+
+    par = AgentParams({"verbose": 0})
+    par.seed = 7
+    restored = MLPAgent(par, (4,), 2, QNetwork_MLP, ReplayBuffer)
+    restored.model_dir = agent.model_dir
+    restored.load_checkpoint("run.ckpt")
+
+    assert restored.eps == 0.5
+    assert len(restored.memory) == 5
+    assert np.random.uniform() == expected
+    for p, q in zip(agent.model.parameters(), restored.model.parameters()):
+        assert (p == q).all()
+
+
+def test_act_batch(agent):
+    actions = agent.act_batch(np.zeros((3, 4)))
+    assert actions.shape == (3,)
+    assert set(actions) <= {0, 1}
+
+
+def test_raw_actions_match_model(agent):
+    observation = agent.memory.get_recent_states(np.random.uniform(size=4)).reshape(-1)
+    action, q_values = agent.get_raw_actions(observation)
+    expected = agent.model(torch.from_numpy(observation).float().unsqueeze(0))
+    assert q_values.shape == (1, 2)
+    assert np.allclose(q_values, expected.detach().numpy(), atol=1e-6)
+    assert action == np.argmax(q_values)
+
+
+def test_raw_actions_follow_updates(agent):
+    agent.batch_size = 8
+    fill_memory(agent)
+    observation = agent.memory.get_recent_states(np.ones(4)).reshape(-1).copy()
+    _, before = agent.get_raw_actions(observation)
+    before = before.copy()
+
+    agent.learn()
+    _, after = agent.get_raw_actions(observation)
+    expected = agent.model(torch.from_numpy(observation).unsqueeze(0))
+    expected = expected.detach().numpy()
+    assert not np.allclose(before, after)
+    assert np.allclose(after, expected, atol=1e-6)
+
+
+def test_quantize(agent):
+    observation = agent.memory.get_recent_states(np.ones(4)).reshape(-1).copy()
+    agent.quantize()
+    _, q_values = agent.get_raw_actions(observation)
+    expected = agent.quantized_model(torch.from_numpy(observation).unsqueeze(0))
+    assert agent.act_model is agent.quantized_model
+    assert np.allclose(q_values, expected.numpy())
+    assert agent.model.input_layer.weight.dtype == torch.float32
+
+    agreement, size_ratio = agent.quantization_report(np.random.uniform(size=(50, 16)))
+    assert 0 <= agreement <= 1
+    assert 0 < size_ratio < 1
+
+    agent.dequantize()
+    assert agent.act_model is agent.traced_model
+
+
+def test_learn_bf16_float16_states():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 8
+    par.bf16 = True
+    par.memory_params.state_dtype = "float16"
+    agent = MLPAgent(par, (4,), 2, QNetwork_MLP, ArrayBuffer)
+    fill_memory(agent)
+    parameters = agent.model.flat_parameters.clone()
+
+    loss = agent.learn()
+    assert np.isfinite(loss)
+    assert agent.model.flat_parameters.dtype == torch.float32
+    assert not torch.equal(agent.model.flat_parameters, parameters)
+
+
+def test_step_batch(agent):
+    agent.step_batch(
+        np.zeros((3, 4)),
+        np.array([0, 1, 0]),
+        np.zeros(3),
+        np.ones((3, 4)),
+        np.array([False, True, False]),
+    )
+    assert len(agent.memory) == 3
+
+
+def fill_memory(agent, n=16):
+    for i in range(n):
+        agent.step(np.full((4,), i % 5), i % 2, 1.0, np.full((4,), i % 5 + 1), False)
+
+
+def test_soft_update_target_model(agent):
+    agent.batch_size = 8
+    fill_memory(agent)
+    target = [p.detach().clone() for p in agent.target_model.parameters()]
+    agent.learn()
+
+    for expected, target_param, param in zip(
+        target, agent.target_model.parameters(), agent.model.parameters()
+    ):
+        expected = agent.tau * param.detach() + (1 - agent.tau) * expected
+        assert torch.allclose(target_param, expected, atol=1e-7)
+
+
+def test_target_update_period(agent):
+    agent.batch_size = 8
+    agent.update_every = 3
+    fill_memory(agent)
+    target = agent.target_model.flat_parameters.clone()
+
+    agent.learn()
+    agent.learn()
+    assert torch.equal(agent.target_model.flat_parameters, target)
+    agent.learn()
+    assert not torch.equal(agent.target_model.flat_parameters, target)
+
+
+def test_gradients_clipped(agent):
+    agent.batch_size = 8
+    agent.clip_grad = 1e-4
+    fill_memory(agent)
+    agent.learn()
+    assert agent.model.flat_gradients.abs().max() <= 1e-4
+
+
+def test_replay_ratio_updates(agent):
+    agent.batch_size = 4
+    agent.replay_ratio = 3
+    fill_memory(agent)
+
+    sample_sizes = []
+    sample = agent.memory.sample
+    agent.memory.sample = lambda n: sample_sizes.append(n) or sample(n)
+
+    assert agent.learn() is not None
+    assert sample_sizes == [12]
+    assert agent.learn_step == 3
+
+
+def test_replay_ratio_prioritized():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 4
+    par.replay_ratio = 2
+    agent = MLPAgent(par, (4,), 2, QNetwork_MLP, PrioritizedBuffer)
+    fill_memory(agent)
+
+    assert agent.learn() is not None
+    assert agent.learn_step == 2
+    priorities = agent.memory.tree.get(np.arange(16))
+    assert len(np.unique(priorities)) > 1
+
+
+def test_replay_ratio_minibatches_cover_buffer():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 64
+    par.replay_ratio = 4
+    par.memory_params.memory_size = 1000
+    agent = MLPAgent(par, (4,), 2, QNetwork_MLP, PrioritizedBuffer)
+    fill_memory(agent, 1000)
+
+    minibatches = []
+    update = agent._update
+    agent._update = lambda *batch: minibatches.append(batch) or update(*batch)
+    agent.learn()
+
+    assert len(minibatches) == 4
+    for *_, weights, indices in minibatches:
+        # stratified indices are in segment order: each minibatch spans the buffer
+        assert indices.min() < 250 and indices.max() > 750
+        assert weights.max().item() == pytest.approx(1.0)
@@ -0,0 +1,64 @@
+import pytest
+import numpy as np
+from core.utils.params import EnvParams
+from core.envs import ENV_DICT
+from core.envs.subproc import SubprocGymEnv
+from core.envs.vector import VectorEnv
+from core.envs.gym import GymEnv
+
+
+def make_params(ready_envs=0):
+    par = EnvParams({"verbose": 0})
+    par.seed = 123
+    par.game = "LunarLander-v2"
+    par.num_envs = 3
+    par.ready_envs = ready_envs
+    return par
+
+
+@pytest.fixture
+def env_subproc():
+    env = SubprocGymEnv(make_params(), max_steps_in_episode=5)
+    yield env
+    env.close()
+
+
+def test_registered():
+    assert ENV_DICT["gym_subproc"] is SubprocGymEnv
+
+
+def test_env_state_shape(env_subproc):
+    assert env_subproc.get_state_shape() == (8,)
+    assert env_subproc.get_action_size() == 4
+
+
+def test_same_transitions_as_vector_env(env_subproc):
+    vector = VectorEnv(GymEnv, make_params(), max_steps_in_episode=5)
+    assert np.allclose(env_subproc.reset(), vector.reset())
+    for t in range(7):
+        actions = np.array([t % 4, 1, 2])
+        expected = vector.step(actions)
+        for result, target in zip(env_subproc.step(actions), expected):
+            assert np.allclose(result, target)
+        assert (env_subproc.resets == vector.resets).all()
+        assert np.allclose(env_subproc.observations, vector.observations)
+
+
+def test_async_returns_ready_envs():
+    env = SubprocGymEnv(make_params(ready_envs=1), max_steps_in_episode=5)
+    env.reset()
+    assert (env.ready == np.arange(3)).all()
+
+    next_states, rewards, dones = env.step(np.zeros(3, dtype=int))
+    assert 1 <= len(env.ready) == len(next_states) == len(rewards) == len(dones)
+
+    # only the returned environments get new actions
+    env.step(np.zeros(len(env.ready), dtype=int))
+    env.close()
+
+
+def test_close_stops_workers():
+    env = SubprocGymEnv(make_params(), max_steps_in_episode=5)
+    env.reset()
+    env.close()
+    assert not any(process.is_alive() for process in env.processes)
@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+from core.utils.params import EnvParams, MonitorParams
+from core.envs import ENV_DICT
+from core.envs.synthetic import SyntheticEnv
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+
+
+@pytest.fixture
+def env_params():
+    par = EnvParams({"verbose": 0})
+    par.seed = 123
+    par.synthetic_obs_size = 5
+    par.synthetic_action_size = 3
+    par.synthetic_episode_length = 10
+    return par
+
+
+def test_registered():
+    assert ENV_DICT["synthetic"] is SyntheticEnv
+
+
+def test_env_shapes(env_params):
+    env = SyntheticEnv(env_params)
+    assert env.get_state_shape() == (5,)
+    assert env.get_action_size() == 3
+    assert env.reset().shape == (5,)
+
+
+def test_env_seeded(env_params):
+    trajectories = []
+    for _ in range(2):
+        env = SyntheticEnv(env_params)
+        states = [env.reset()]
+        for action in [0, 1, 2, 1]:
+            states.append(env.step(action)[0])
+        trajectories.append(np.array(states))
+    assert np.array_equal(trajectories[0], trajectories[1])
+
+    env_params.seed = 7
+    env = SyntheticEnv(env_params)
+    assert not np.array_equal(env.reset(), trajectories[0][0])
+
+
+def test_episode_length(env_params):
+    env = SyntheticEnv(env_params)
+    env.reset()
+    dones = [env.step(0)[2] for _ in range(10)]
+    assert dones == [False] * 9 + [True]
+    env.reset()
+    assert not env.step(0)[2]
+
+
+def test_step_cost(env_params):
+    env_params.synthetic_step_cost = 3
+    env = SyntheticEnv(env_params)
+    env.reset()
+    vector = env.cost_vector.copy()
+    state, reward, _ = env.step(1)
+    assert not np.array_equal(env.cost_vector, vector)
+    assert isinstance(reward, float)
+
+
+def test_render(env_params):
+    env = SyntheticEnv(env_params)
+    env.reset()
+    img = env.render()
+    assert img.shape == (32, 40, 3) and img.dtype == np.uint8
+
+
+def test_monitor_trains_on_synthetic():
+    par = MonitorParams(verbose=0, machine="test", config_number=2)
+    par.seed = 123
+    par.max_steps_in_episode = 50
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    monitor.agent.batch_size = 16
+    reward, steps, loss = monitor._train_on_episode()
+    assert steps == 50
+    assert np.isfinite(loss)
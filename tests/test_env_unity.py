@@ -0,0 +1,132 @@
+import pytest
+import numpy as np
+from core.utils.params import EnvParams, MonitorParams
+from core.envs import ENV_DICT
+from core.envs.unity import UnityEnv, UnityBatchEnv
+from core.envs.unity_local import LocalUnityEnvironment
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+
+
+@pytest.fixture(autouse=True)
+def local_unity(monkeypatch):
+    monkeypatch.setattr("core.envs.unity.UnityEnvironment", LocalUnityEnvironment)
+
+
+@pytest.fixture
+def env_params():
+    par = EnvParams({"verbose": 0, "config_number": 1})
+    par.seed = 123
+    return par
+
+
+@pytest.fixture
+def env_batch(env_params):
+    return UnityBatchEnv(env_params, max_steps_in_episode=10)
+
+
+def test_registered():
+    assert ENV_DICT["unity_batched"] is UnityBatchEnv
+
+
+def test_single_agent(env_params, monkeypatch):
+    monkeypatch.setattr(LocalUnityEnvironment, "n_agents", 1)
+    env = UnityEnv(env_params)
+    assert env.get_state_shape() == (4,)
+    assert env.get_action_size() == 4
+    env.reset()
+    next_state, reward, done = env.step(0)
+    assert next_state.shape == (4,)
+
+
+def test_batch_shapes(env_batch):
+    assert env_batch.num_envs == 4
+    assert env_batch.reset().shape == (4, 4)
+
+    next_states, rewards, dones = env_batch.step(np.zeros(4, dtype=int))
+    assert next_states.shape == (4, 4)
+    assert rewards.shape == (4,) and dones.shape == (4,)
+
+
+def test_batch_actions_per_agent(env_batch):
+    states = env_batch.reset()
+    next_states, _, _ = env_batch.step(np.array([0, 1, 2, 3]))
+    moves = (next_states - states)[:, 0] * 10
+    assert np.allclose(moves, [1, -1, 0, 0])
+
+
+def test_batch_resets_after_max_steps(env_batch):
+    env_batch.reset()
+    for _ in range(10):
+        env_batch.step(np.full(4, 2))
+    assert env_batch.resets.all()
+    assert (env_batch.observations[:, 3] == 1).all()
+
+
+def test_eval_env_on_next_worker(env_batch):
+    eval_env = env_batch.make_eval_env()
+    assert isinstance(eval_env, UnityEnv)
+    assert not isinstance(eval_env, UnityBatchEnv)
+    assert eval_env.env.worker_id == env_batch.env.worker_id + 1
+
+
+def test_eval_env_acts_for_agent_zero(env_batch, env_params):
+    env_params.unity_noop_action = 2
+    eval_env = env_batch.make_eval_env()
+    state = eval_env.reset()
+    others = eval_env.env.positions[1:].copy()
+    next_state, reward, done = eval_env.step(0)
+    assert next_state.shape == (4,)
+    assert next_state[0] - state[0] == pytest.approx(0.1)
+    # the other agents stay
+    assert (eval_env.env.positions[1:] == others).all()
+
+
+def test_monitor_stores_all_agents():
+    par = MonitorParams(
+        **{"verbose": 0, "machine": "test", "visualize": False, "config_number": 1}
+    )
+    par.seed = 123
+    par.max_steps_in_episode = 20
+    par.checkpoint_freq_by_episodes = 0
+
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT["arraybuffer"],
+        env_prototype=ENV_DICT["unity_batched"],
+    )
+    assert monitor.num_envs == 4
+
+    monitor.train_n_episodes = 8
+    monitor.eval_during_training = False
+    monitor.train()
+    assert len(monitor.agent.memory) == monitor.counter_steps
+    assert monitor.counter_steps % 4 == 0
+
+
+def test_monitor_evaluates_multi_agent_scene():
+    par = MonitorParams(
+        **{"verbose": 0, "machine": "test", "visualize": False, "config_number": 1}
+    )
+    par.seed = 123
+    par.max_steps_in_episode = 20
+    par.checkpoint_freq_by_episodes = 0
+
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT["arraybuffer"],
+        env_prototype=ENV_DICT["unity_batched"],
+    )
+    monitor.train_n_episodes = 4
+    monitor.eval_during_training = True
+    monitor.eval_freq = 2
+    monitor.eval_steps = 30
+    monitor.train()
+    assert len(monitor.summaries["eval_steps_avg"]["log"]) == 2
+    assert len(monitor.summaries["eval_state_values"]["log"]) == 30
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+from core.utils.params import EnvParams
+from core.envs.gym import GymEnv
+from core.envs.vector import VectorEnv
+
+
+@pytest.fixture
+def env_vector():
+    par = EnvParams({"verbose": 0})
+    par.seed = 123
+    par.game = "LunarLander-v2"
+    par.num_envs = 3
+    return VectorEnv(GymEnv, par, max_steps_in_episode=5)
+
+
+def test_env_state_shape(env_vector):
+    assert env_vector.get_state_shape() == (8,)
+
+
+def test_env_reset(env_vector):
+    states = env_vector.reset()
+    assert states.shape == (3, 8)
+    # one seed per environment
+    assert not np.array_equal(states[0], states[1])
+
+
+def test_env_step(env_vector):
+    env_vector.reset()
+    next_states, rewards, dones = env_vector.step(np.zeros(3, dtype=int))
+    assert next_states.shape == (3, 8)
+    assert rewards.shape == (3,) and dones.shape == (3,)
+    assert (env_vector.observations == next_states).all()
+
+
+def test_env_resets_after_max_steps(env_vector):
+    env_vector.reset()
+    for _ in range(5):
+        next_states, _, _ = env_vector.step(np.zeros(3, dtype=int))
+    assert env_vector.resets.all()
+    assert (env_vector.episode_steps == 0).all()
+    assert not np.array_equal(env_vector.observations, next_states)
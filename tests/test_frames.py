@@ -0,0 +1,102 @@
+import imageio
+import numpy as np
+import pytest
+from core.utils.frames import FrameEncoder
+from core.utils.params import MonitorParams
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+def frames(n):
+    return [np.full((16, 24, 3), 10 * i, dtype=np.uint8) for i in range(n)]
+
+
+def test_jpg_frames(tmp_path):
+    encoder = FrameEncoder(workers=2, queue_size=4)
+    encoder.start(str(tmp_path / "eval"))
+    for i, frame in enumerate(frames(10)):
+        encoder.add(i, frame)
+    encoder.finish()
+    assert sorted(p.name for p in (tmp_path / "eval").iterdir())[-1] == "00009.jpg"
+    assert imageio.imread(tmp_path / "eval" / "00003.jpg").shape == (16, 24, 3)
+    encoder.close()
+
+
+def test_gif_video_by_run(tmp_path):
+    encoder = FrameEncoder(video_format="gif")
+    for run in range(2):
+        encoder.start(str(tmp_path), f"run{run}")
+        for i, frame in enumerate(frames(5 + run)):
+            encoder.add(i, frame)
+    encoder.close()
+    video = imageio.mimread(tmp_path / "run1.gif")
+    assert len(video) == 6
+    assert video[3][0, 0, 0] == 30
+    assert len(imageio.mimread(tmp_path / "run0.gif")) == 5
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        FrameEncoder(video_format="avi")
+
+
+def test_encoding_errors_are_logged(tmp_path):
+    class Logger:
+        warnings = []
+
+        def warning(self, message):
+            self.warnings.append(message)
+
+    def imsave(name, frame):
+        raise OSError("disk full")
+
+    logger = Logger()
+    encoder = FrameEncoder(imsave, logger=logger)
+    encoder.start(str(tmp_path))
+    encoder.add(0, frames(1)[0])
+    encoder.close()
+    assert "1 frames" in logger.warnings[0]
+    assert "disk full" in logger.warnings[0]
+
+
+def test_eval_renders_once_per_step(tmp_path):
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "env_render": True})
+    par.seed = 123
+    par.img_dir = str(tmp_path) + "/"
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    monitor.eval_steps = 20
+    monitor.eval_agent()
+    monitor.close()
+
+    assert len(list((tmp_path / "eval").iterdir())) == 20
+    assert monitor.timer.summary()["phases"]["render"]["calls"] == 20
+
+
+def test_test_agent_saves_frames_without_render(tmp_path):
+    par = MonitorParams(**{"verbose": 0, "machine": "test"})
+    par.seed = 123
+    par.img_dir = str(tmp_path) + "/"
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    assert monitor.frames is None
+    monitor.agent.model_dir = str(tmp_path) + "/"
+    monitor.agent.save("model.pth")
+    monitor.test_n_episodes = 1
+    monitor.test_agent("model.pth")
+    monitor.close()
+
+    assert len(list((tmp_path / "test").iterdir())) > 0
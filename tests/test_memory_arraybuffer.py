@@ -0,0 +1,145 @@
+import pytest
+import unittest
+from core.utils.params import MemoryParams
+from core.memories import ArrayBuffer, MEMORY_DICT
+from core.utils.params import AgentParams
+from core.models.dqn_mlp import QNetwork_MLP
+from core.agents import MLPAgent
+import numpy as np
+import torch
+
+
+class TestArrayBufferMethods(unittest.TestCase):
+    def setUp(self):
+        self.memory_params = MemoryParams({"verbose": 0})
+        self.memory_params.window_length = 2
+        self.memory_params.memory_size = 1000
+        self.memory_params.seed = 123
+        self.memory_params.combined_with_last = False
+
+        states = np.arange(50).reshape(-1, 2)
+        next_states = np.arange(2, 52).reshape(-1, 2)
+        actions = np.arange(0, 25, 1) ** 2
+        rewards = np.linspace(-1, 2, 25)
+        terms = np.zeros(25)
+
+        self.memory = ArrayBuffer(self.memory_params)
+
+        for s, a, r, s2, d in zip(states, actions, rewards, next_states, terms):
+            self.memory.append(s, a, r, s2, d)
+            self.memory.append_recent(s, d)
+
+    def test_registered(self):
+        self.assertIs(MEMORY_DICT["arraybuffer"], ArrayBuffer)
+
+    def test_length_memory(self):
+        self.assertEqual(25, len(self.memory))
+
+    def test_memory(self):
+        self.assertTrue((np.array([6, 7]) == self.memory.states[3]).all())
+
+    def test_sample_size(self):
+        self.assertEqual(4, len(self.memory.sample(4)[0]))
+
+    def test_sample_return_sarsd(self):
+        self.assertEqual(
+            5,
+            len(self.memory.sample(1)),
+            msg="Must return (state, action, reward, next_state, done) tuple",
+        )
+
+    def test_sample_dtypes(self):
+        states, actions, rewards, next_states, dones = self.memory.sample(8)
+        assert states.dtype == torch.float32 and states.shape == (8, 2)
+        assert actions.dtype == torch.int64 and actions.shape == (8, 1)
+        assert rewards.dtype == torch.float32 and rewards.shape == (8, 1)
+        assert next_states.dtype == torch.float32 and next_states.shape == (8, 2)
+        assert dones.dtype == torch.float32 and dones.shape == (8, 1)
+
+    def test_sample_consistent_transitions(self):
+        states, actions, _, next_states, _ = self.memory.sample(32)
+        states = states.numpy()
+        assert (next_states.numpy() == states + 2).all()
+        assert (actions.numpy().flatten() == (states[:, 0] // 2) ** 2).all()
+
+    def test_sample_only_filled_slots(self):
+        states = self.memory.sample(256)[0].numpy()
+        assert states.max() <= 49
+
+    def test_missing_params_memory(self):
+        with pytest.raises(TypeError):
+            ArrayBuffer()
+
+
+class TestArrayBufferOverwrite(unittest.TestCase):
+    def setUp(self):
+        self.memory_params = MemoryParams({"verbose": 0})
+        self.memory_params.window_length = 1
+        self.memory_params.memory_size = 24
+        self.memory_params.seed = 123
+        self.memory_params.combined_with_last = True
+
+        states = np.arange(50).reshape(-1, 2)
+        next_states = np.arange(2, 52).reshape(-1, 2)
+        actions = np.arange(0, 25, 1) ** 2
+        rewards = np.linspace(-1, 2, 25)
+        terms = np.zeros(25)
+
+        self.memory = ArrayBuffer(self.memory_params)
+
+        for s, a, r, s2, d in zip(states, actions, rewards, next_states, terms):
+            self.memory.append(s, a, r, s2, d)
+
+    def test_length_capped(self):
+        self.assertEqual(24, len(self.memory))
+
+    def test_overwritting(self):
+        self.assertTrue(np.all(np.array([48, 49]) == self.memory.states[0]))
+        self.assertTrue(np.all(np.array([2, 3]) == self.memory.states[1]))
+
+    def test_append_batch_wraps(self):
+        self.memory.append_batch(
+            np.array([[100, 101], [102, 103]]),
+            np.array([1, 2]),
+            np.array([0.5, 0.5]),
+            np.array([[102, 103], [104, 105]]),
+            np.array([False, True]),
+        )
+        self.assertEqual(3, self.memory.cursor)
+        self.assertTrue(np.all(np.array([102, 103]) == self.memory.states[2]))
+        self.assertEqual(1.0, self.memory.dones[2, 0])
+
+    def test_combined_with_last(self):
+        s = np.array([500, 501])
+        s2 = np.array([600, 601])
+        self.memory.append(s, 2, 2, s2, False)
+        sample = self.memory.sample(10)
+        assert len(sample[0]) == 11
+        assert (sample[0][-1].numpy() == s).all()
+
+
+def test_drop_in_for_mlp_agent():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 4
+    agent = MLPAgent(par, (2,), 2, QNetwork_MLP, ArrayBuffer)
+
+    for i in range(8):
+        agent.step(np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), i == 7)
+
+    assert len(agent.memory) == 8
+    assert agent.learn() is not None
+
+
+def test_float16_states():
+    memory_params = MemoryParams({"verbose": 0})
+    memory_params.memory_size = 8
+    memory_params.state_dtype = "float16"
+    memory = ArrayBuffer(memory_params)
+    memory.append_batch(
+        np.full((4, 2), 0.5), np.zeros(4), np.ones(4), np.full((4, 2), 1.5), np.zeros(4)
+    )
+    assert memory.states.dtype == np.float16
+    states, _, rewards, next_states, _ = memory.sample(4)
+    assert states.dtype == torch.float16 and rewards.dtype == torch.float32
+    assert (next_states == 1.5).all()
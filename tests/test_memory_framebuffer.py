@@ -0,0 +1,107 @@
+import pytest
+import unittest
+from core.utils.params import MemoryParams
+from core.memories import FrameBuffer, ReplayBuffer, MEMORY_DICT
+import numpy as np
+
+
+def episodes(n_steps, episode_len):
+    observations = np.arange(2 * (n_steps + 1)).reshape(-1, 2) + 1
+    for t in range(n_steps):
+        done = (t + 1) % episode_len == 0
+        yield observations[t], t % 3, float(t), observations[t + 1], done
+
+
+def memory_params(window_length, memory_size):
+    par = MemoryParams({"verbose": 0})
+    par.window_length = window_length
+    par.memory_size = memory_size
+    par.seed = 123
+    par.combined_with_last = False
+    return par
+
+
+class TestFrameBuffer(unittest.TestCase):
+    def setUp(self):
+        self.memory = FrameBuffer(memory_params(3, 1000))
+        self.reference = ReplayBuffer(memory_params(3, 1000))
+        for transition in episodes(40, 7):
+            self.memory.store(*transition)
+            self.reference.store(*transition)
+
+    def test_registered(self):
+        self.assertIs(MEMORY_DICT["framebuffer"], FrameBuffer)
+
+    def test_length_memory(self):
+        self.assertEqual(40, len(self.memory))
+
+    def test_stores_raw_observations_once(self):
+        self.assertEqual((1000, 2), self.memory.frames.shape)
+
+    def test_same_windows_as_stacked_replay(self):
+        indices = np.arange(40)
+        states, actions, rewards, next_states, dones = self.memory._gather(indices)
+        for i, e in zip(indices, self.reference.memory):
+            assert (states[i] == e.state).all()
+            assert actions[i, 0] == e.action
+            assert rewards[i, 0] == e.reward
+            assert dones[i, 0] == e.done
+            if not e.done:
+                assert (next_states[i] == e.next_state).all()
+
+    def test_sample_return_sarsd(self):
+        sample = self.memory.sample(16)
+        self.assertEqual(5, len(sample))
+        self.assertEqual((16, 8), tuple(sample[0].shape))
+        self.assertEqual((16, 8), tuple(sample[3].shape))
+
+    def test_recent_states_follow_store(self):
+        assert (
+            self.memory.get_recent_states(np.array([77, 88]))
+            == self.reference.get_recent_states(np.array([77, 88]))
+        ).all()
+
+
+class TestFrameBufferOverwrite(unittest.TestCase):
+    def setUp(self):
+        self.memory = FrameBuffer(memory_params(2, 16))
+        self.reference = ReplayBuffer(memory_params(2, 16))
+        for transition in episodes(45, 10):
+            self.memory.store(*transition)
+            self.reference.store(*transition)
+
+    def test_length_capped(self):
+        self.assertEqual(16, len(self.memory))
+
+    def test_same_windows_after_wrap(self):
+        # deque position j is buffer slot (cursor + j) % memory_size, the two oldest
+        # transitions lost their history frames in the frame buffer
+        indices = (self.memory.cursor + np.arange(16)) % 16
+        states, _, _, next_states, dones = self.memory._gather(indices)
+        for j, e in enumerate(self.reference.memory):
+            if j >= 2:
+                assert (states[j] == e.state).all()
+            if not e.done:
+                assert (next_states[j] == e.next_state).all()
+
+    def test_oldest_history_zeroed(self):
+        states = self.memory._gather(np.array([self.memory.cursor]))[0]
+        assert (states[0, :4] == 0).all()
+
+
+class TestFrameBufferTruncatedEpisode(unittest.TestCase):
+    def setUp(self):
+        self.memory = FrameBuffer(memory_params(1, 100))
+        self.memory.store(np.array([1, 1]), 0, 0.0, np.array([2, 2]), False)
+        self.memory.store(np.array([2, 2]), 0, 0.0, np.array([3, 3]), False)
+        # new episode without terminal
+        self.memory.store(np.array([9, 9]), 0, 0.0, np.array([8, 8]), False)
+
+    def test_truncated_transition_never_sampled(self):
+        states = self.memory.sample(64)[0].numpy()
+        assert not (states[:, 2:] == 2).all(axis=1).any()
+
+    def test_history_zeroed_across_truncation(self):
+        states, _, _, next_states, _ = self.memory._gather(np.array([2]))
+        assert (states[0] == np.array([0, 0, 9, 9])).all()
+        assert (next_states[0] == np.array([9, 9, 8, 8])).all()
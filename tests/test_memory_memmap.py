@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from core.utils.params import MemoryParams
+from core.memories import MemmapBuffer, MEMORY_DICT
+
+
+@pytest.fixture
+def memory_params(tmp_path):
+    par = MemoryParams({"verbose": 0})
+    par.memory_size = 24
+    par.seed = 123
+    par.memory_dir = str(tmp_path / "run") + "/"
+    par.memmap_flush_every = 10
+    return par
+
+
+def fill(memory, n):
+    for i in range(n):
+        memory.append(np.full((2,), i), i, float(i), np.full((2,), i + 2), i % 5 == 4)
+
+
+def test_registered():
+    assert MEMORY_DICT["memmap"] is MemmapBuffer
+
+
+def test_arrays_are_memmapped(memory_params):
+    memory = MemmapBuffer(memory_params)
+    fill(memory, 5)
+    assert isinstance(memory.states, np.memmap)
+    assert (memory.states[3] == np.array([3, 3])).all()
+
+
+def test_sample(memory_params):
+    memory = MemmapBuffer(memory_params)
+    fill(memory, 30)
+    states, actions, rewards, next_states, dones = memory.sample(16)
+    assert len(memory) == 24
+    assert (next_states == states + 2).all()
+    assert (actions.flatten() == states[:, 0].long()).all()
+
+
+def test_reopen_after_close(memory_params):
+    memory = MemmapBuffer(memory_params)
+    fill(memory, 30)
+    memory.close()
+
+    reopened = MemmapBuffer(memory_params)
+    assert len(reopened) == 24
+    assert reopened.cursor == memory.cursor
+    assert (np.asarray(reopened.states) == np.asarray(memory.states)).all()
+    assert (np.asarray(reopened.dones) == np.asarray(memory.dones)).all()
+
+
+def test_reopen_keeps_last_flush(memory_params):
+    memory = MemmapBuffer(memory_params)
+    fill(memory, 13)
+
+    reopened = MemmapBuffer(memory_params)
+    assert len(reopened) == 10
+    assert reopened.cursor == 10
+
+
+def test_size_mismatch_starts_empty(memory_params):
+    memory = MemmapBuffer(memory_params)
+    fill(memory, 12)
+    memory.close()
+
+    memory_params.memory_size = 48
+    reopened = MemmapBuffer(memory_params)
+    assert len(reopened) == 0
+    fill(reopened, 1)
+    assert reopened.states.shape == (48, 2)
@@ -21,3 +21,103 @@ class TestMemory(unittest.TestCase):
     def test_raises_not_implemented(self):
         with pytest.raises(NotImplementedError):
             self.memory.sample(1)
+
+
+@pytest.mark.parametrize(
+    "memory_type",
+    ["replaybuffer", "arraybuffer", "framebuffer", "prioritized", "tensorbuffer"],
+)
+def test_save_load_roundtrip(memory_type, tmp_path):
+    from core.memories import MEMORY_DICT
+
+    par = MemoryParams({"verbose": 0})
+    par.memory_size = 16
+    par.window_length = 2
+    par.seed = 123
+
+    memory = MEMORY_DICT[memory_type](par)
+    for i in range(20):
+        memory.store(
+            np.full((2,), i), i % 3, float(i), np.full((2,), i + 1), i % 7 == 6
+        )
+    memory.save(str(tmp_path / "snapshot"))
+
+    restored = MEMORY_DICT[memory_type](par)
+    restored.load(str(tmp_path / "snapshot"))
+
+    assert len(restored) == len(memory)
+    assert (
+        restored.get_recent_states(np.array([50, 50]))
+        == memory.get_recent_states(np.array([50, 50]))
+    ).all()
+    columns, _ = memory._columns()
+    restored_columns, _ = restored._columns()
+    for name, column in columns.items():
+        assert (np.asarray(column) == np.asarray(restored_columns[name])).all()
+
+    if memory_type != "replaybuffer":
+        # replaybuffer samples with the global random module
+        for field, restored_field in zip(memory.sample(8), restored.sample(8)):
+            assert (np.asarray(field) == np.asarray(restored_field)).all()
+
+
+def test_save_load_batch_window(tmp_path):
+    from core.memories import ArrayBuffer
+
+    par = MemoryParams({"verbose": 0})
+    par.memory_size = 16
+    par.window_length = 2
+    memory = ArrayBuffer(par)
+    # the last step only moves the first environment
+    for i, streams in enumerate([None, None, np.array([0])]):
+        n = 2 if streams is None else 1
+        observations = np.full((n, 2), i, dtype=np.float32)
+        memory.store_batch(
+            observations,
+            np.zeros(n, dtype=np.int64),
+            np.zeros(n, dtype=np.float32),
+            observations + 1,
+            np.zeros(n, dtype=bool),
+            streams=streams,
+        )
+    memory.save(str(tmp_path / "snapshot"))
+
+    restored = ArrayBuffer(par)
+    restored.load(str(tmp_path / "snapshot"))
+    assert (restored.batch_window.positions == memory.batch_window.positions).all()
+    assert not restored.batch_window.aligned
+    current = np.full((2, 2), 9, dtype=np.float32)
+    assert (
+        restored.get_recent_states_batch(current)
+        == memory.get_recent_states_batch(current)
+    ).all()
+
+
+def test_save_writes_npy_columns(tmp_path):
+    from core.memories import ArrayBuffer
+
+    par = MemoryParams({"verbose": 0})
+    memory = ArrayBuffer(par)
+    memory.store(np.zeros(2), 0, 0.0, np.ones(2), False)
+    memory.save(str(tmp_path))
+
+    states = np.load(str(tmp_path / "states.npy"), allow_pickle=False)
+    assert states.shape == (1, 2)
+
+
+def test_save_over_loaded_snapshot(tmp_path):
+    from core.memories import ArrayBuffer
+
+    par = MemoryParams({"verbose": 0})
+    par.memory_size = 4
+    memory = ArrayBuffer(par)
+    for i in range(6):
+        memory.store(np.full((2,), i), 0, 0.0, np.full((2,), i + 1), False)
+    memory.save(str(tmp_path / "snapshot"))
+
+    restored = ArrayBuffer(par)
+    restored.load(str(tmp_path / "snapshot"))
+    restored.store(np.full((2,), 9), 0, 0.0, np.full((2,), 10), False)
+    restored.save(str(tmp_path / "snapshot"))
+
+    assert (restored.states[:, -2:] == np.array([[4, 4], [5, 5], [9, 9], [3, 3]])).all()
@@ -0,0 +1,93 @@
+import pytest
+import threading
+import numpy as np
+from core.utils.params import MemoryParams, AgentParams
+from core.memories import ArrayBuffer
+from core.memories.prefetcher import Prefetcher
+from core.models.dqn_mlp import QNetwork_MLP
+from core.agents import MLPAgent
+
+
+@pytest.fixture
+def memory():
+    par = MemoryParams({"verbose": 0})
+    par.memory_size = 64
+    par.seed = 123
+    memory = ArrayBuffer(par)
+    for i in range(64):
+        memory.append(np.full((2,), i), i, 0.0, np.full((2,), i + 2), False)
+    return memory
+
+
+def test_get_batch(memory):
+    prefetcher = Prefetcher(memory, 8, 2)
+    states = prefetcher.get()[0]
+    prefetcher.close()
+    assert tuple(states.shape) == (8, 2)
+    assert prefetcher.n_batches == 1
+
+
+def test_bounded_queue(memory):
+    prefetcher = Prefetcher(memory, 8, 3)
+    prefetcher.get()
+    assert prefetcher.queue.qsize() <= 3
+    prefetcher.close()
+
+
+def test_close_stops_worker(memory):
+    prefetcher = Prefetcher(memory, 8, 1)
+    prefetcher.close()
+    assert not prefetcher.thread.is_alive()
+    assert prefetcher.queue.empty()
+
+
+def test_sample_error_raised_by_get(memory):
+    # fewer transitions than a batch: sampling fails on the worker
+    memory.sample = lambda batch_size: np.random.choice(64, batch_size, replace=False)
+    prefetcher = Prefetcher(memory, 128, 2)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            prefetcher.get()
+    assert not prefetcher.thread.is_alive()
+    prefetcher.close()
+
+
+def test_consistent_with_concurrent_writes(memory):
+    prefetcher = Prefetcher(memory, 32, 2)
+    stop = threading.Event()
+
+    def write():
+        i = 64
+        while not stop.is_set():
+            with memory.lock:
+                memory.append(np.full((2,), i), i, 0.0, np.full((2,), i + 2), False)
+            i += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(50):
+            states, actions, _, next_states, _ = prefetcher.get()
+            assert (next_states == states + 2).all()
+            assert (actions.flatten() == states[:, 0].long()).all()
+    finally:
+        stop.set()
+        writer.join()
+        prefetcher.close()
+
+
+def test_agent_learns_from_prefetcher():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 4
+    par.prefetch = 2
+    agent = MLPAgent(par, (2,), 2, QNetwork_MLP, ArrayBuffer)
+
+    for i in range(8):
+        agent.step(np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), i == 7)
+
+    assert agent.learn() is not None
+    assert agent.prefetcher.n_batches == 1
+    assert agent.prefetcher.hidden_latency() >= 0.0
+    agent.close()
+    assert agent.prefetcher is None
@@ -0,0 +1,97 @@
+import pytest
+import unittest
+from core.utils.params import MemoryParams, AgentParams
+from core.memories import PrioritizedBuffer, SumTree, MEMORY_DICT
+from core.models.dqn_mlp import QNetwork_MLP
+from core.agents import MLPAgent
+import numpy as np
+
+
+class TestSumTree(unittest.TestCase):
+    def setUp(self):
+        self.tree = SumTree(5)
+        self.tree.update(np.arange(5), np.array([1.0, 2.0, 3.0, 0.5, 3.5]))
+
+    def test_power_of_two_leaves(self):
+        self.assertEqual(8, self.tree.n_leaves)
+
+    def test_total(self):
+        self.assertEqual(10.0, self.tree.total())
+
+    def test_find(self):
+        values = np.array([0.0, 0.5, 1.5, 2.9, 3.5, 6.2, 6.7, 9.99])
+        assert list(self.tree.find(values)) == [0, 0, 1, 1, 2, 3, 4, 4]
+
+    def test_set_matches_update(self):
+        self.tree.set(2, 10.0)
+        self.assertEqual(17.0, self.tree.total())
+        self.assertEqual(13.5, self.tree.nodes[2])
+
+    def test_update_duplicate_indices(self):
+        self.tree.update(np.array([1, 1, 3]), np.array([0.0, 0.0, 1.5]))
+        self.assertEqual(9.0, self.tree.total())
+
+    def test_proportional_sampling(self):
+        rng = np.random.RandomState(0)
+        found = self.tree.find(rng.uniform(size=100000) * self.tree.total())
+        frequencies = np.bincount(found, minlength=5) / len(found)
+        np.testing.assert_allclose(frequencies, [0.1, 0.2, 0.3, 0.05, 0.35], atol=0.01)
+
+
+class TestPrioritizedBuffer(unittest.TestCase):
+    def setUp(self):
+        self.memory_params = MemoryParams({"verbose": 0})
+        self.memory_params.memory_size = 100
+        self.memory_params.seed = 123
+        self.memory = PrioritizedBuffer(self.memory_params)
+
+        for i in range(20):
+            self.memory.append(
+                np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), False
+            )
+
+    def test_registered(self):
+        self.assertIs(MEMORY_DICT["prioritized"], PrioritizedBuffer)
+
+    def test_length_memory(self):
+        self.assertEqual(20, len(self.memory))
+
+    def test_sample_returns_weights_and_indices(self):
+        sample = self.memory.sample(8)
+        self.assertEqual(7, len(sample))
+        weights, indices = sample[5:]
+        self.assertEqual((8, 1), tuple(weights.shape))
+        assert (sample[0][:, 0].numpy() == indices).all()
+
+    def test_uniform_weights_at_start(self):
+        weights = self.memory.sample(8)[5]
+        assert (weights.numpy() == 1.0).all()
+
+    def test_update_priorities(self):
+        indices = np.arange(20)
+        td_errors = np.zeros(20)
+        td_errors[7] = 100.0
+        self.memory.update_priorities(indices, td_errors)
+        indices = self.memory.sample(16)[6]
+        assert (indices == 7).sum() >= 15
+
+    def test_new_transitions_get_max_priority(self):
+        self.memory.update_priorities(np.array([0]), np.array([5.0]))
+        self.memory.append(np.zeros(2), 0, 0.0, np.zeros(2), False)
+        assert self.memory.tree.get(np.array([20]))[0] == pytest.approx(
+            self.memory.tree.get(np.array([0]))[0]
+        )
+
+
+def test_mlp_agent_learns_with_priorities():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 4
+    agent = MLPAgent(par, (2,), 2, QNetwork_MLP, PrioritizedBuffer)
+
+    for i in range(8):
+        agent.step(np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), i == 7)
+
+    before = agent.memory.tree.total()
+    assert agent.learn() is not None
+    assert agent.memory.tree.total() != before
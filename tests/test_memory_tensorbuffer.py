@@ -0,0 +1,135 @@
+import pytest
+import unittest
+from core.utils.params import MemoryParams, AgentParams
+from core.memories import TensorBuffer, MEMORY_DICT
+from core.models.dqn_mlp import QNetwork_MLP
+from core.agents import MLPAgent
+import numpy as np
+import torch
+
+
+class TestTensorBuffer(unittest.TestCase):
+    def setUp(self):
+        self.memory_params = MemoryParams({"verbose": 0})
+        self.memory_params.memory_size = 24
+        self.memory_params.seed = 123
+        self.memory_params.combined_with_last = False
+
+        states = np.arange(50).reshape(-1, 2)
+        next_states = np.arange(2, 52).reshape(-1, 2)
+        actions = np.arange(0, 25, 1) ** 2
+        rewards = np.linspace(-1, 2, 25)
+        terms = np.zeros(25)
+
+        self.memory = TensorBuffer(self.memory_params)
+
+        for s, a, r, s2, d in zip(states, actions, rewards, next_states, terms):
+            self.memory.append(s, a, r, s2, d)
+
+    def test_registered(self):
+        self.assertIs(MEMORY_DICT["tensorbuffer"], TensorBuffer)
+
+    def test_storage_is_tensor(self):
+        assert isinstance(self.memory.states, torch.Tensor)
+        assert self.memory.states.device == self.memory.device
+
+    def test_length_capped(self):
+        self.assertEqual(24, len(self.memory))
+
+    def test_overwritting(self):
+        assert (self.memory.states[0].numpy() == np.array([48, 49])).all()
+
+    def test_sample_dtypes(self):
+        states, actions, rewards, next_states, dones = self.memory.sample(8)
+        assert states.dtype == torch.float32 and states.shape == (8, 2)
+        assert actions.dtype == torch.int64 and actions.shape == (8, 1)
+        assert rewards.dtype == torch.float32 and rewards.shape == (8, 1)
+        assert dones.dtype == torch.float32 and dones.shape == (8, 1)
+
+    def test_sample_consistent_transitions(self):
+        states, actions, _, next_states, _ = self.memory.sample(32)
+        assert (next_states == states + 2).all()
+        assert (actions.flatten() == (states[:, 0].long() // 2) ** 2).all()
+
+    def test_combined_with_last(self):
+        self.memory.combined_with_last = True
+        s = np.array([500, 501])
+        self.memory.append(s, 2, 2, s + 100, False)
+        sample = self.memory.sample(10)
+        assert len(sample[0]) == 11
+        assert (sample[0][-1].numpy() == s).all()
+
+    def test_pinned_falls_back_without_cuda(self):
+        self.memory_params.tensor_storage = "pinned"
+        self.memory_params.use_cuda = False
+        memory = TensorBuffer(self.memory_params)
+        assert not memory.pinned
+
+
+def test_drop_in_for_mlp_agent():
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    par.batch_size = 4
+    agent = MLPAgent(par, (2,), 2, QNetwork_MLP, TensorBuffer)
+
+    for i in range(8):
+        agent.step(np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), i == 7)
+
+    assert len(agent.memory) == 8
+    assert agent.learn() is not None
+
+
+def test_bfloat16_states_roundtrip(tmp_path):
+    memory_params = MemoryParams({"verbose": 0})
+    memory_params.memory_size = 8
+    memory_params.state_dtype = "bfloat16"
+    memory = TensorBuffer(memory_params)
+    for i in range(8):
+        memory.append(np.full((2,), i + 0.5), i % 2, 1.0, np.full((2,), i + 1.5), False)
+    assert memory.states.dtype == torch.bfloat16
+    assert memory.states.element_size() == 2
+
+    memory.save(str(tmp_path / "memory"))
+    restored = TensorBuffer(memory_params)
+    restored.load(str(tmp_path / "memory"))
+    assert restored.states.dtype == torch.bfloat16
+    assert torch.equal(restored.states, memory.states)
+    assert torch.equal(restored.next_states, memory.next_states)
+
+
+def test_bfloat16_states_append_batch():
+    memory_params = MemoryParams({"verbose": 0})
+    memory_params.memory_size = 8
+    memory_params.state_dtype = "bfloat16"
+    memory = TensorBuffer(memory_params)
+    observations = np.arange(8, dtype=np.float32).reshape(4, 2) + 0.5
+    memory.append_batch(
+        observations, np.zeros(4), np.ones(4), observations + 1, np.zeros(4)
+    )
+    assert memory.states.dtype == torch.bfloat16
+    assert torch.equal(memory.states[:4].float(), torch.from_numpy(observations))
+    assert torch.equal(
+        memory.next_states[:4].float(), torch.from_numpy(observations + 1)
+    )
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="pinned storage needs CUDA")
+def test_pinned_sample_reuses_staging():
+    memory_params = MemoryParams({"verbose": 0})
+    memory_params.memory_size = 16
+    memory_params.use_cuda = True
+    memory_params.tensor_storage = "pinned"
+    memory = TensorBuffer(memory_params)
+    for i in range(16):
+        memory.append(np.full((2,), i), i % 2, 1.0, np.full((2,), i + 1), False)
+
+    states, actions, _, next_states, _ = memory.sample(8)
+    staging = memory.staging[8]
+    assert all(out.is_pinned() for out in staging)
+    assert states.is_cuda
+    assert (next_states == states + 1).all()
+    assert (actions.flatten() == states[:, 0].long() % 2).all()
+
+    memory.sample(8)
+    assert len(memory.staging) == 1
+    assert memory.staging[8][0].data_ptr() == staging[0].data_ptr()
@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from core.memories.window import RollingWindow
+
+
+@pytest.fixture
+def window():
+    window = RollingWindow(2, n_windows=2)
+    for i in range(5):
+        window.append(np.array([i, i]), False)
+    return window
+
+
+def test_states_at_start():
+    window = RollingWindow(3)
+    assert (
+        window.states(np.array([7, 8])) == np.array([[0, 0], [0, 0], [0, 0], [7, 8]])
+    ).all()
+
+
+def test_states(window):
+    assert (window.states(np.array([7, 8])) == np.array([[3, 3], [4, 4], [7, 8]])).all()
+
+
+def test_next_states(window):
+    states = window.states(np.array([7, 8]), np.array([9, 9]))
+    assert (states == np.array([[4, 4], [7, 8], [9, 9]])).all()
+
+
+def test_states_are_views(window):
+    assert window.states(np.array([7, 8])).base is window.frames
+
+
+def test_history_survives_wrap(window):
+    for i in range(5, 40):
+        window.append(np.array([i, i]), False)
+        assert (window.history() == np.array([[i - 1, i - 1], [i, i]])).all()
+
+
+def test_terminal_zeroes_history(window):
+    window.append(np.array([5, 5]), True)
+    assert (window.history() == 0).all()
+    window.append(np.array([6, 6]), False)
+    assert (window.history() == np.array([[0, 0], [6, 6]])).all()
+
+
+def test_next_state_reused_after_append(window):
+    next_states = window.states(np.array([7, 8]), np.array([9, 9])).copy()
+    window.append(np.array([7, 8]), False)
+    assert (window.frames[0, window.position] == np.array([9, 9])).all()
+    assert (window.states(np.array([9, 9])) == next_states).all()
+
+
+def test_no_history():
+    window = RollingWindow(0)
+    window.append(np.array([1, 2]), False)
+    assert (window.states(np.array([7, 8])) == np.array([[7, 8]])).all()
+
+
+def test_batch_states():
+    window = RollingWindow(2)
+    window.batch_append(np.array([[1, 1], [2, 2]]), np.array([False, False]))
+    states = window.batch_states(np.array([[3, 3], [4, 4]]), np.array([[5, 5], [6, 6]]))
+    assert states.shape == (2, 3, 2)
+    assert (states[0] == np.array([[1, 1], [3, 3], [5, 5]])).all()
+    assert (states[1] == np.array([[2, 2], [4, 4], [6, 6]])).all()
+
+
+def test_batch_terminal_zeroes_its_stream_only():
+    window = RollingWindow(2)
+    window.batch_append(np.array([[1, 1], [2, 2]]), np.array([False, True]))
+    states = window.batch_states(np.array([[3, 3], [4, 4]]))
+    assert (states[0] == np.array([[0, 0], [1, 1], [3, 3]])).all()
+    assert (states[1] == np.array([[0, 0], [0, 0], [4, 4]])).all()
+
+
+def test_batch_streams_step_independently():
+    window = RollingWindow(2)
+    window.batch_append(np.array([[1, 1], [2, 2]]), np.array([False, False]))
+    # only the second stream stepped
+    window.batch_append(np.array([[4, 4]]), np.array([False]), streams=np.array([1]))
+    assert not window.aligned
+
+    states = window.batch_states(np.array([[3, 3], [5, 5]]))
+    assert (states[0] == np.array([[0, 0], [1, 1], [3, 3]])).all()
+    assert (states[1] == np.array([[2, 2], [4, 4], [5, 5]])).all()
@@ -53,3 +53,35 @@ def test_model_forward(model):
     state = torch.from_numpy(np.array([[2.5]])).float()
     output = model.forward(state).cpu().detach().numpy()
     assert pytest.approx(output[0][0], 0.001) == -0.606
+
+
+def test_flatten_parameters(model):
+    state = torch.from_numpy(np.array([[2.5]])).float()
+    expected = model.forward(state).detach()
+    model.flatten_parameters()
+
+    assert torch.equal(model.forward(state).detach(), expected)
+    for parameter in model.parameters():
+        assert parameter.data_ptr() >= model.flat_parameters.data_ptr()
+    model.flat_parameters.zero_()
+    assert all((p == 0).all() for p in model.parameters())
+
+
+def test_flat_gradients_accumulate_in_place(model):
+    model.flatten_parameters()
+    state = torch.from_numpy(np.array([[2.5]])).float()
+    model.forward(state).sum().backward()
+    assert model.flat_gradients.abs().sum() > 0
+    assert torch.equal(
+        model.flat_gradients[: model.input_layer.weight.numel()],
+        model.input_layer.weight.grad.reshape(-1),
+    )
+
+
+def test_forward_quantized_layers(model):
+    states = torch.linspace(-3, 3, 50).reshape(-1, 1)
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    with torch.no_grad():
+        assert torch.allclose(quantized(states), model(states), atol=0.05)
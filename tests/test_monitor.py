@@ -61,3 +61,114 @@ def test_train_evaluation(monitor):
     assert monitor.summaries["eval_state_values"]["log"][-1][1] == pytest.approx(
         -0.122016974, 0.001
     )
+
+
+def test_eval_quantized(monitor):
+    monitor.agent.quantize_eval = True
+    monitor.eval_steps = 50
+    monitor.eval_agent()
+    assert len(monitor.summaries["eval_state_values"]["log"]) == 50
+    assert monitor.agent.act_model is monitor.agent.traced_model
+
+
+def test_train_vector_envs():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.seed = 123
+    par.env_params.num_envs = 4
+    par.max_steps_in_episode = 20
+    par.checkpoint_freq_by_episodes = 0
+
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    monitor.train_n_episodes = 6
+    monitor.eval_during_training = False
+    monitor.train()
+
+    assert monitor.counter_steps % 4 == 0
+    assert len(monitor.agent.memory) == monitor.counter_steps
+    # as many updates by environment step as with a single environment
+    learn_calls = monitor.timer.summary()["phases"]["learn"]["calls"]
+    assert learn_calls == monitor.counter_steps // monitor.agent.learn_every
+
+
+def test_frame_buffer_rejects_vector_envs():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.env_params.num_envs = 2
+
+    with pytest.raises(ValueError, match="single environment stream"):
+        Monitor(
+            monitor_param=par,
+            agent_prototype=AGENT_DICT[par.agent_type],
+            model_prototype=MODEL_DICT[par.model_type],
+            memory_prototype=MEMORY_DICT["framebuffer"],
+            env_prototype=ENV_DICT[par.env_type],
+        )
+
+
+def test_train_subprocess_envs():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.seed = 123
+    par.env_params.num_envs = 3
+    par.env_params.ready_envs = 2
+    par.max_steps_in_episode = 20
+    par.checkpoint_freq_by_episodes = 0
+
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT["gym_subproc"],
+    )
+    monitor.train_n_episodes = 6
+    monitor.eval_during_training = False
+    monitor.train()
+    monitor.close()
+
+    assert len(monitor.agent.memory) == monitor.counter_steps
+    assert not any(process.is_alive() for process in monitor.env.processes)
+
+
+def test_resume_restores_counters(tmp_path):
+    def make(resume):
+        par = MonitorParams(
+            **{"verbose": 0, "machine": "test", "resume": resume, "checkpoint_freq": 2}
+        )
+        par.seed = 123
+        par.max_steps_in_episode = 20
+        par.agent_params.model_dir = str(tmp_path) + "/"
+        return Monitor(
+            monitor_param=par,
+            agent_prototype=AGENT_DICT[par.agent_type],
+            model_prototype=MODEL_DICT[par.model_type],
+            memory_prototype=MEMORY_DICT[par.memory_type],
+            env_prototype=ENV_DICT[par.env_type],
+        )
+
+    monitor = make(resume=False)
+    monitor.train_n_episodes = 4
+    monitor.eval_during_training = False
+    monitor.train()
+    steps = monitor.counter_steps
+
+    resumed = make(resume=True)
+    assert resumed.counter_steps == steps
+    assert resumed.resumed["i_episode"] == 4
+    assert len(resumed.resumed["rewards_window"]) == 4
+    assert resumed.agent.eps == monitor.agent.eps
+
+    resumed.train_n_episodes = 6
+    resumed.eval_during_training = False
+    resumed.train()
+    # episodes 5 and 6 only
+    assert steps < resumed.counter_steps <= steps + 2 * 20
+
+
+def test_checkpoint_off_by_default():
+    par = MonitorParams(verbose=0, machine="test")
+    assert par.checkpoint_freq_by_episodes == 0
@@ -0,0 +1,124 @@
+import pytest
+import numpy as np
+from time import perf_counter
+from core.utils.params import MonitorParams
+from core.monitors import MONITOR_DICT, DistributedMonitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+def torch_vector(model):
+    return np.concatenate([p.detach().numpy().ravel() for p in model.parameters()])
+
+
+@pytest.fixture
+def monitor():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.seed = 123
+    par.monitor_type = "distributed"
+    par.n_actors = 2
+    par.actor_send_every = 10
+    par.weights_publish_every = 5
+    par.max_steps_in_episode = 30
+    par.checkpoint_freq_by_episodes = 0
+    par.agent_params.batch_size = 16
+
+    return MONITOR_DICT[par.monitor_type](
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT["arraybuffer"],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+
+
+def test_registered(monitor):
+    assert isinstance(monitor, DistributedMonitor)
+
+
+def test_actor_epsilons(monitor):
+    assert monitor.actor_eps[0] == pytest.approx(0.4)
+    assert monitor.actor_eps[1] == pytest.approx(0.4**8)
+
+
+def test_train(monitor):
+    monitor.train_n_episodes = 6
+    monitor.eval_during_training = False
+    monitor.report_freq = 3
+    monitor.train()
+
+    assert monitor.counter_steps > 0
+    assert len(monitor.agent.memory) == monitor.counter_steps
+    assert monitor.n_updates > 0
+    assert monitor.weights_version.value == 2 * (1 + monitor.n_updates // 5)
+    assert monitor.actors == []
+
+    actor_steps, learner_updates = monitor.throughput()
+    assert actor_steps > 0 and learner_updates > 0
+
+
+def test_published_weights_match_learner(monitor):
+    monitor._start_actors()
+    monitor._stop_actors()
+    for param in monitor.agent.model.parameters():
+        param.data.add_(1.0)
+    monitor._publish_weights()
+
+    vector = torch_vector(monitor.agent.model)
+    assert np.allclose(monitor.weights.numpy(), vector)
+
+
+def test_learn_calls_bounded_by_received_transitions(monitor):
+    calls = []
+    learn = monitor.agent.learn
+    monitor.agent.learn = lambda: calls.append(1) or learn()
+    monitor.train_n_episodes = 6
+    monitor.eval_during_training = False
+    monitor.report_freq = 3
+    monitor.train()
+
+    learn_every = monitor.agent.learn_every
+    assert len(calls) > 0
+    assert len(calls) * learn_every == monitor.counter_steps - monitor.pending_steps
+    assert monitor.pending_steps < learn_every
+
+
+def test_throughput_counts_this_run(monitor):
+    # as restored by a resumed checkpoint
+    monitor.counter_steps = 100000
+    monitor.train_n_episodes = 2
+    monitor.eval_during_training = False
+    monitor.train()
+
+    assert monitor.n_received == monitor.counter_steps - 100000
+    actor_steps, _ = monitor.throughput()
+    elapsed = perf_counter() - monitor.start_time
+    assert actor_steps == pytest.approx(monitor.n_received / elapsed, rel=0.05)
+
+
+class FailingEnv(ENV_DICT["synthetic"]):
+    def step(self, action):
+        raise RuntimeError("env crashed")
+
+
+def test_failed_actors_stop_training():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.seed = 123
+    par.monitor_type = "distributed"
+    par.n_actors = 2
+    par.checkpoint_freq_by_episodes = 0
+    monitor = MONITOR_DICT[par.monitor_type](
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT["arraybuffer"],
+        env_prototype=FailingEnv,
+    )
+    monitor.train_n_episodes = 2
+    monitor.eval_during_training = False
+
+    with pytest.raises(RuntimeError, match="actor-"):
+        monitor.train()
+    assert monitor.actors == []
@@ -0,0 +1,42 @@
+import torch
+from core.utils.params import MonitorParams, AgentParams, RunContext
+import core.utils.params as params
+
+
+def test_context_shared():
+    par = MonitorParams(verbose=0, machine="test")
+    context = par.context
+    agent_params = par.agent_params
+    for component in (
+        agent_params,
+        agent_params.model_params,
+        agent_params.memory_params,
+        par.env_params,
+    ):
+        assert component.context is context
+        assert component.logger is context.logger
+        assert component.refs == "test_"
+        assert component.env_type == context.config["env_type"]
+
+
+def test_context_built_once(monkeypatch):
+    clients = []
+    monkeypatch.setattr(params.visdom, "Visdom", lambda: clients.append(1) or object())
+    par = MonitorParams(verbose=0, machine="test", visualize=True)
+    assert len(clients) == 1
+    assert par.agent_params.memory_params.vis is par.vis
+
+
+def test_standalone_params():
+    par = AgentParams({"verbose": 0, "config_number": 1})
+    assert isinstance(par.context, RunContext)
+    assert par.memory_params.context is par.context
+    assert par.game == par.context.config["game"]
+
+
+def test_device_override_is_local():
+    # distributed actors move their agent params to cpu
+    par = MonitorParams(verbose=0, machine="test")
+    par.agent_params.device = torch.device("cpu")
+    par.agent_params.use_cuda = False
+    assert par.env_params.device == par.context.device
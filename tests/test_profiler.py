@@ -0,0 +1,60 @@
+import json
+import pytest
+from core.utils.profiler import TrainingProfiler
+from core.utils.params import MonitorParams
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+def test_window(tmp_path):
+    profiler = TrainingProfiler(str(tmp_path / "run"), warmup=2, window=3)
+    for episode in range(1, 8):
+        profiler.step(episode * 100)
+        profiler.episode(episode)
+        assert profiler.running == (2 <= episode < 5)
+    assert profiler.done
+    assert (tmp_path / "run.profile.txt").exists()
+    assert (tmp_path / "run.prof").exists()
+    json.loads((tmp_path / "run.trace.json").read_text())
+
+
+def test_unknown_unit(tmp_path):
+    with pytest.raises(ValueError):
+        TrainingProfiler(str(tmp_path / "run"), 0, 1, unit="updates")
+
+
+def test_train_profile_steps(tmp_path):
+    par = MonitorParams(
+        **{"verbose": 0, "machine": "test", "timestamp": "profile", "profile": True}
+    )
+    par.seed = 123
+    par.profile_prefix = str(tmp_path / "run")
+    par.profile_unit = "steps"
+    # learning starts once the memory holds a batch
+    par.profile_warmup = 150
+    par.profile_window = 50
+    par.max_steps_in_episode = 40
+    par.checkpoint_freq_by_episodes = 0
+
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    monitor.train_n_episodes = 8
+    monitor.eval_during_training = False
+    monitor.train()
+
+    assert monitor.profiler.done
+    with open(par.profile_prefix + ".profile.txt") as f:
+        stats = f.read()
+    assert "_train_on_episode" in stats
+    assert "learn" in stats
+    with open(par.profile_prefix + ".trace.json") as f:
+        trace = json.load(f)
+    assert any("aten::" in event.get("name", "") for event in trace["traceEvents"])
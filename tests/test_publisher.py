@@ -0,0 +1,132 @@
+import time
+import numpy as np
+from core.utils.publisher import VisdomPublisher
+from core.utils.params import MonitorParams
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+class Recorder:
+    """Records the visdom calls instead of sending them"""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            time.sleep(self.delay)
+            self.calls.append((method, args, kwargs))
+
+        return call
+
+
+def summaries():
+    return {
+        "reward": {"log": [], "type": "line"},
+        "text_elapsed_time": {"log": "", "type": "text"},
+    }
+
+
+def test_lines_are_appended():
+    vis = Recorder()
+    publisher = VisdomPublisher(vis, "test")
+    logs = summaries()
+
+    logs["reward"]["log"] += [[1, 1.0], [2, 2.0]]
+    logs["text_elapsed_time"]["log"] = "1s"
+    publisher.summaries(logs)
+    publisher.flush()
+    logs["reward"]["log"].append([3, 3.0])
+    publisher.summaries(logs)
+    publisher.flush()
+    # nothing new: no call
+    publisher.summaries(logs)
+    publisher.close()
+
+    lines = [kwargs for method, _, kwargs in vis.calls if method == "line"]
+    assert len(lines) == 2
+    np.testing.assert_array_equal(lines[0]["X"], [1, 2])
+    assert "update" not in lines[0]
+    np.testing.assert_array_equal(lines[1]["X"], [3])
+    assert lines[1]["update"] == "append"
+    assert [method for method, _, _ in vis.calls].count("text") == 1
+
+
+def test_replaced_line_is_resent():
+    vis = Recorder()
+    publisher = VisdomPublisher(vis, "test")
+    logs = summaries()
+    logs["reward"]["log"] = [[0, 1.0], [1, 2.0]]
+    publisher.summaries(logs)
+    publisher.flush()
+    logs["reward"]["log"] = [[0, 5.0]]
+    publisher.summaries(logs)
+    publisher.close()
+
+    last = [kwargs for method, _, kwargs in vis.calls if method == "line"][-1]
+    np.testing.assert_array_equal(last["Y"], [5.0])
+    assert "update" not in last
+
+
+def test_widgets_are_throttled():
+    vis = Recorder(delay=0.01)
+    publisher = VisdomPublisher(vis, "test", widget_interval=0.05)
+    start = time.perf_counter()
+    sent = sum(
+        publisher.widget("q_values", "bar", np.full((4, 1), i)) for i in range(200)
+    )
+    assert time.perf_counter() - start < 0.1
+    publisher.close()
+
+    assert sent == 1
+    assert vis.calls[0][2]["win"] == "q_values"
+    assert vis.calls[0][2]["env"] == "test"
+
+
+def test_publisher_errors_are_logged():
+    class Failing:
+        def bar(self, *args, **kwargs):
+            raise ConnectionError()
+
+    class Logger:
+        warnings = []
+
+        def warning(self, message):
+            self.warnings.append(message)
+
+    logger = Logger()
+    publisher = VisdomPublisher(Failing(), "test", logger=logger)
+    publisher.widget("q_values", "bar", np.zeros((4, 1)))
+    publisher.close()
+    assert "ConnectionError" in logger.warnings[0]
+
+
+def test_monitor_eval_publishes_in_background():
+    par = MonitorParams(**{"verbose": 0, "machine": "test", "visualize": False})
+    par.seed = 123
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    vis = Recorder()
+    monitor.visualize = True
+    monitor.refs = "test"
+    monitor.publisher = VisdomPublisher(vis, "test", widget_interval=60)
+    monitor.eval_steps = 50
+
+    monitor.eval_agent()
+    monitor._visual()
+    monitor.close()
+
+    methods = [method for method, _, _ in vis.calls]
+    # one q-values bar and one render for 50 eval steps
+    assert methods.count("bar") == 1
+    assert methods.count("image") == 1
+    assert methods.count("line") == 4
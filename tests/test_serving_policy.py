@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import pytest
+import numpy as np
+import torch
+from core.utils.params import AgentParams
+from core.models.dqn_mlp import QNetwork_MLP
+from core.memories.replaybuffer import ReplayBuffer
+from core.agents import MLPAgent
+from core.serving import NumpyPolicy
+
+
+@pytest.fixture
+def agent(tmp_path):
+    par = AgentParams({"verbose": 0})
+    par.seed = 123
+    agent = MLPAgent(par, (4,), 3, QNetwork_MLP, ReplayBuffer)
+    agent.model_dir = str(tmp_path) + "/"
+    return agent
+
+
+@pytest.fixture
+def policy(agent):
+    return NumpyPolicy.load(agent.export())
+
+
+def test_load(policy):
+    assert policy.hist_len == 4
+    assert policy.input_size == 16
+    assert policy.action_size == 3
+
+
+def test_q_values_match_model(agent, policy):
+    states = np.random.uniform(-1, 1, size=(64, 16)).astype(np.float32)
+    expected = agent.model(torch.from_numpy(states)).detach().numpy()
+    assert np.allclose(policy.q_values(states), expected, atol=1e-5)
+    assert (policy.act_batch(states) == expected.argmax(1)).all()
+
+
+def test_act_stacks_like_agent_window(agent, policy):
+    for i in range(10):
+        observation = np.random.uniform(size=4)
+        terminal = i == 5
+        states = agent.memory.get_recent_states(observation).reshape(-1)
+        expected, _ = agent.get_raw_actions(states)
+
+        assert policy.act(observation) == expected
+        assert (policy.history.reshape(-1) == states).all()
+        agent.memory.append_recent(observation, terminal)
+        policy.append_recent(observation, terminal)
+
+
+def test_no_torch_import():
+    code = "import sys, core.serving; assert 'torch' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
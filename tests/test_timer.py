@@ -0,0 +1,73 @@
+import json
+import time
+import pytest
+from core.utils.timer import PhaseTimer
+from core.utils.params import MonitorParams
+from core.monitors import Monitor
+from core.agents import AGENT_DICT
+from core.models import MODEL_DICT
+from core.memories import MEMORY_DICT
+from core.envs import ENV_DICT
+
+
+def test_phase_counts():
+    timer = PhaseTimer()
+    for _ in range(3):
+        with timer["act"]:
+            time.sleep(0.002)
+    phase = timer.summary()["phases"]["act"]
+    assert phase["calls"] == 3
+    assert phase["total_s"] >= 0.006
+    assert sum(phase["histogram_us"].values()) == 3
+    # 2 ms sleeps fall in the [1024, 2048) bucket or a slower one
+    assert all(int(bucket[1:]) >= 2048 for bucket in phase["histogram_us"])
+
+
+def test_phase_times_on_error():
+    timer = PhaseTimer()
+    with pytest.raises(ValueError):
+        with timer["learn"]:
+            raise ValueError()
+    assert timer.phases["learn"].calls == 1
+
+
+def test_disabled():
+    timer = PhaseTimer(enabled=False)
+    with timer["act"]:
+        pass
+    assert timer.phases == {}
+
+
+def test_export(tmp_path):
+    timer = PhaseTimer()
+    with timer["act"]:
+        pass
+    timer.export(str(tmp_path / "timings.json"))
+    with open(tmp_path / "timings.json") as f:
+        summary = json.load(f)
+    assert summary["phases"]["act"]["calls"] == 1
+
+
+def test_monitor_phases(tmp_path):
+    par = MonitorParams(verbose=0, machine="test", config_number=2)
+    par.seed = 123
+    par.max_steps_in_episode = 40
+    par.timings_filename = str(tmp_path / "timings.json")
+    monitor = Monitor(
+        monitor_param=par,
+        agent_prototype=AGENT_DICT[par.agent_type],
+        model_prototype=MODEL_DICT[par.model_type],
+        memory_prototype=MEMORY_DICT[par.memory_type],
+        env_prototype=ENV_DICT[par.env_type],
+    )
+    monitor.agent.batch_size = 16
+    monitor.train_n_episodes = 1
+    monitor.eval_during_training = False
+    monitor.train()
+
+    with open(par.timings_filename) as f:
+        phases = json.load(f)["phases"]
+    for name in ["act", "env.step", "agent.step", "learn"]:
+        assert phases[name]["calls"] == 40
+    assert phases["learn.sample"]["calls"] == phases["learn.update"]["calls"] == 25
+    assert phases["learn.target"]["calls"] == 25